@@ -20,6 +20,14 @@ class SimplePIIService:
             'name': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',  # Simple name pattern
         }
         
+        # All patterns compiled into one alternation with a named group per entity type,
+        # so a text is scanned once. Where matches overlap the leftmost one wins, and at
+        # the same position the earlier type in this priority order wins.
+        self.priority = ['email', 'ssn', 'credit_card', 'phone', 'name']
+        self.pattern = re.compile(
+            '|'.join(f'(?P<{entity_type}>{self.patterns[entity_type]})' for entity_type in self.priority)
+        )
+        
         self.replacement_map = {}
         
     def analyze_text(self, text: str) -> List[Dict]:
@@ -32,19 +40,27 @@ class SimplePIIService:
         Returns:
             List of detected entities
         """
-        entities = []
-        
-        for entity_type, pattern in self.patterns.items():
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                entities.append({
-                    'entity_type': entity_type,
-                    'start': match.start(),
-                    'end': match.end(),
-                    'text': match.group()
-                })
+        return [
+            {
+                'entity_type': match.lastgroup,
+                'start': match.start(),
+                'end': match.end(),
+                'text': match.group()
+            }
+            for match in self.pattern.finditer(text)
+        ]
+    
+    def analyze_batch(self, texts) -> List[List[Dict]]:
+        """
+        Analyze a whole column of texts for PII entities.
         
-        return entities
+        Args:
+            texts: pandas Series (or any iterable) of texts; non-string cells yield no entities
+            
+        Returns:
+            One list of detected entities per text, in input order
+        """
+        return [self.analyze_text(text) if isinstance(text, str) else [] for text in texts]
     
     def anonymize_text(self, text: str, entities: List[Dict], operator: str = "replace") -> Tuple[str, Dict]:
         """
@@ -58,36 +74,58 @@ class SimplePIIService:
         Returns:
             Tuple of (anonymized_text, mapping_dict)
         """
-        anonymized_text = text
         mapping = {}
+        parts = []
+        position = 0
         
-        # Sort entities by start position in reverse order to avoid index shifting
-        sorted_entities = sorted(entities, key=lambda x: x['start'], reverse=True)
-        
-        for entity in sorted_entities:
-            original_text = entity['text']
-            entity_type = entity['entity_type']
+        # Walk the entities left to right and build the output with a single join;
+        # an entity overlapping one already replaced is skipped
+        for entity in sorted(entities, key=lambda x: (x['start'], -x['end'])):
             start = entity['start']
             end = entity['end']
-            
-            if operator == "replace":
-                replacement = f"[{entity_type.upper()}]"
-            elif operator == "mask":
-                replacement = "*" * len(original_text)
-            elif operator == "encrypt":
-                # Simple hash-based encryption
-                hash_obj = hashlib.md5(original_text.encode())
-                replacement = f"[{entity_type.upper()}_{hash_obj.hexdigest()[:8]}]"
-            else:
-                replacement = f"[{entity_type.upper()}]"
-            
-            # Replace the text
-            anonymized_text = anonymized_text[:start] + replacement + anonymized_text[end:]
+            if start < position:
+                continue
+            original_text = entity['text']
+            replacement = self._replacement(entity['entity_type'], original_text, operator)
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = end
             
             # Store mapping for deanonymization
             mapping[replacement] = original_text
         
-        return anonymized_text, mapping
+        parts.append(text[position:])
+        return ''.join(parts), mapping
+    
+    def anonymize_batch(self, texts, operator: str = "replace"):
+        """
+        Detect and anonymize PII in a whole column of texts in one regex pass per text.
+        
+        Args:
+            texts: pandas Series (or any iterable) of texts; non-string cells are returned unchanged
+            operator: Anonymization method ('replace', 'mask', 'encrypt')
+            
+        Returns:
+            A pandas Series aligned with the input if a Series was given, otherwise a list
+        """
+        def replace(match):
+            return self._replacement(match.lastgroup, match.group(), operator)
+        
+        anonymized = [self.pattern.sub(replace, text) if isinstance(text, str) else text for text in texts]
+        if isinstance(texts, pd.Series):
+            return pd.Series(anonymized, index=texts.index, name=texts.name)
+        return anonymized
+    
+    @staticmethod
+    def _replacement(entity_type: str, original_text: str, operator: str) -> str:
+        """Build the replacement string for one entity."""
+        if operator == "mask":
+            return "*" * len(original_text)
+        if operator == "encrypt":
+            # Simple hash-based encryption
+            hash_obj = hashlib.md5(original_text.encode())
+            return f"[{entity_type.upper()}_{hash_obj.hexdigest()[:8]}]"
+        return f"[{entity_type.upper()}]"
     
     def deanonymize_text(self, anonymized_text: str) -> str:
         """
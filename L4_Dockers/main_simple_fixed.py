@@ -13,6 +13,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from googlereviews import CSVProcessor
 from PII.pii_simple import SimplePIIService
+from profanity_masker.matcher import ProfanityMatcher
+from sentiment_classifier.lexicon import LexiconSentiment
 
 class SimpleProfanityMasker:
     """Simple profanity masker using basic word filtering."""
@@ -24,17 +26,18 @@ class SimpleProfanityMasker:
             'idiot', 'moron', 'dumb', 'hate', 'suck', 'terrible', 'awful',
             'horrible', 'disgusting', 'pathetic', 'worst', 'useless'
         ]
+        # Compiled once: whole words only, leetspeak variants included, casing kept
+        self.matcher = ProfanityMatcher(self.profanity_words)
     
     def mask_profanity(self, text):
         """Mask profanity words with asterisks."""
         if not text:
             return text
-            
-        masked_text = str(text).lower()
-        for word in self.profanity_words:
-            if word in masked_text:
-                masked_text = masked_text.replace(word, '*' * len(word))
-        return masked_text
+        return self.matcher.mask(str(text))
+    
+    def mask_batch(self, texts):
+        """Mask profanity in a whole column in one pass."""
+        return self.matcher.mask_batch(texts)
 
 class SimpleSentimentClassifier:
     """Simple sentiment classifier using basic text analysis."""
@@ -53,22 +56,19 @@ class SimpleSentimentClassifier:
             'hate', 'disappointed', 'angry', 'frustrated', 'annoyed', 'upset',
             'sad', 'poor', 'cheap', 'dirty', 'slow', 'rude', 'unfriendly'
         ]
+        # Whole words only (so "sad" does not match "crusade"), with negation handling
+        self.engine = LexiconSentiment.from_words(self.positive_words, self.negative_words)
     
     def infer(self, text):
         """Simple sentiment inference based on word counts."""
         if not text:
             return "NEUTRAL"
-            
-        text_lower = str(text).lower()
-        positive_count = sum(1 for word in self.positive_words if word in text_lower)
-        negative_count = sum(1 for word in self.negative_words if word in text_lower)
-        
-        if positive_count > negative_count:
-            return "POSITIVE"
-        elif negative_count > positive_count:
-            return "NEGATIVE"
-        else:
-            return "NEUTRAL"
+        return self.engine.predict(str(text))[0]
+    
+    def infer_batch(self, texts):
+        """Classify a whole column in one vectorized pass."""
+        labels, _ = self.engine.predict_batch(texts)
+        return labels
 
 def main():
     """Main pipeline function."""
@@ -106,18 +106,10 @@ def main():
     # Step 2: PII Anonymization
     print("🔒 Step 2: Anonymizing PII...")
     pii_service = SimplePIIService()
-    anonymized_texts = []
     
-    for index, row in df_sample.iterrows():
-        text = str(row.iloc[0]) if len(row) > 0 else ""
-        
-        # Analyze and anonymize PII
-        entities = pii_service.analyze_text(text)
-        anonymized_text, mapping = pii_service.anonymize_text(text, entities, "replace")
-        anonymized_texts.append(anonymized_text)
-        
-        if (index + 1) % 5 == 0:
-            print(f"   Processed {index + 1}/{sample_size} rows")
+    # Analyze and anonymize the whole review column, one regex pass per review
+    anonymized_texts = pii_service.anonymize_batch(df_sample.iloc[:, 0].astype(str), "replace").tolist()
+    print(f"   Processed {len(anonymized_texts)}/{sample_size} rows")
     
     df_sample['Anonymized_Text'] = anonymized_texts
     print("✅ PII anonymization complete")
@@ -125,11 +117,7 @@ def main():
     # Step 3: Profanity Masking
     print("🚫 Step 3: Masking profanity...")
     profanity_masker = SimpleProfanityMasker()
-    masked_texts = []
-    
-    for text in anonymized_texts:
-        masked_text = profanity_masker.mask_profanity(text)
-        masked_texts.append(masked_text)
+    masked_texts = profanity_masker.mask_batch(anonymized_texts)
     
     df_sample['Masked_Text'] = masked_texts
     print("✅ Profanity masking complete")
@@ -137,11 +125,7 @@ def main():
     # Step 4: Sentiment Classification
     print("💭 Step 4: Classifying sentiment...")
     classifier = SimpleSentimentClassifier()
-    sentiments = []
-    
-    for text in masked_texts:
-        sentiment = classifier.infer(text)
-        sentiments.append(sentiment)
+    sentiments = classifier.infer_batch(masked_texts)
     
     df_sample['Sentiment'] = sentiments
     print("✅ Sentiment classification complete")
@@ -165,7 +149,7 @@ def main():
     # Show summary
     print("\n📊 Processing Summary:")
     print(f"   📥 Input rows: {len(df_sample)}")
-    print(f"   🔒 PII entities found: {sum(len(pii_service.analyze_text(str(text))) for text in df_sample.iloc[:, 0])}")
+    print(f"   🔒 PII entities found: {sum(len(entities) for entities in pii_service.analyze_batch(df_sample.iloc[:, 0].astype(str)))}")
     
     sentiment_counts = pd.Series(sentiments).value_counts()
     for sentiment, count in sentiment_counts.items():
@@ -0,0 +1,187 @@
+import os
+
+import pandas as pd
+
+# Leetspeak substitutions per letter, the same table better_profanity uses to
+# generate word variants. Here it is inverted and applied while scanning instead.
+LEET_CHARS = {
+    "a": ("a", "@", "*", "4"),
+    "i": ("i", "*", "l", "1"),
+    "o": ("o", "*", "0", "@"),
+    "u": ("u", "*", "v"),
+    "v": ("v", "*", "u"),
+    "l": ("l", "1"),
+    "e": ("e", "*", "3"),
+    "s": ("s", "$", "5"),
+    "t": ("t", "7"),
+}
+# Symbols that can stand in for a letter, and so belong to words rather than separate them
+WORD_SYMBOLS = {variant for variants in LEET_CHARS.values() for variant in variants if not variant.isalnum()}
+# Joins the rows of a batch; it ends every match so nothing is found across two rows
+ROW_BREAK = "\x00"
+
+_END = "$end"
+_SEP = " "
+
+
+def default_wordlist_path():
+    """Path of the word list shipped with better_profanity"""
+    import better_profanity
+
+    return os.path.join(os.path.dirname(better_profanity.__file__), "profanity_wordlist.txt")
+
+
+def default_wordlist():
+    """The word list shipped with better_profanity"""
+    return read_wordlist(default_wordlist_path())
+
+
+def read_wordlist(path):
+    """One word or phrase per line; blank lines are ignored"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class ProfanityMatcher:
+    """
+    Masks words from a word list in one left-to-right pass over the text.
+
+    The words are compiled once into a trie over lowercase letters. While scanning,
+    each character is mapped to the letters it can stand for (so "sh1t" and "$hit"
+    match "shit"), matches may only start and end on word boundaries, and phrases
+    match across any run of spaces or punctuation ("blow  job", "blow-job").
+    Everything outside a match is copied through with its original casing.
+    """
+
+    def __init__(self, words, censor_char="*", mask_length=None):
+        """
+        :param words: Words or phrases to mask, matched case-insensitively.
+        :param censor_char: Character used for the mask.
+        :param mask_length: Fixed mask length (better_profanity uses 4), or None to
+                            mask each match with as many characters as it has.
+        """
+        self.censor_char = censor_char
+        self.mask_length = mask_length
+        self.trie = {}
+        self.size = 0
+        for word in words:
+            self.add(word)
+        self.leet = {}
+        for letter, variants in LEET_CHARS.items():
+            for variant in variants:
+                self.leet.setdefault(variant, set()).add(letter)
+        self.leet = {char: tuple(letters | {char}) for char, letters in self.leet.items()}
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        return cls(read_wordlist(path), **kwargs)
+
+    @staticmethod
+    def is_word_char(char):
+        return char.isalnum() or char in WORD_SYMBOLS
+
+    def add(self, word):
+        """Add one word or phrase; non-word characters in it match any separator run"""
+        node = self.trie
+        after_sep = True
+        for char in word.strip().lower():
+            if self.is_word_char(char):
+                node = node.setdefault(char, {})
+                after_sep = False
+            elif not after_sep:
+                node = node.setdefault(_SEP, {})
+                after_sep = True
+        if node is not self.trie and not node.get(_END):
+            node[_END] = True
+            self.size += 1
+
+    def find(self, text):
+        """
+        Locate masked words in text.
+
+        :return: Non-overlapping (start, end) spans, leftmost-longest first.
+        """
+        matches = []
+        # Partial matches as (trie node, start index, whether the last character was a separator)
+        active = []
+        word_start = True
+        for index, char in enumerate(text):
+            lower = char.lower()
+            if self.is_word_char(lower):
+                if word_start:
+                    active.append((self.trie, index, False))
+                    word_start = False
+                advanced = []
+                for node, start, _ in active:
+                    for letter in self.leet.get(lower, (lower,)):
+                        child = node.get(letter)
+                        if child is not None:
+                            advanced.append((child, start, False))
+                active = advanced
+                continue
+            word_start = True
+            if not active:
+                continue
+            advanced = []
+            row_break = char == ROW_BREAK
+            for node, start, after_sep in active:
+                if after_sep:
+                    if not row_break:
+                        advanced.append((node, start, True))
+                    continue
+                if _END in node:
+                    matches.append((start, index))
+                child = node.get(_SEP)
+                if child is not None and not row_break:
+                    advanced.append((child, start, True))
+            active = advanced
+        for node, start, after_sep in active:
+            if not after_sep and _END in node:
+                matches.append((start, len(text)))
+        return self._select(matches)
+
+    @staticmethod
+    def _select(matches):
+        selected = []
+        position = 0
+        for start, end in sorted(matches, key=lambda span: (span[0], -span[1])):
+            if start >= position:
+                selected.append((start, end))
+                position = end
+        return selected
+
+    def mask(self, text):
+        """Return text with every match replaced by the censor mask"""
+        spans = self.find(text)
+        if not spans:
+            return text
+        parts = []
+        position = 0
+        for start, end in spans:
+            parts.append(text[position:start])
+            parts.append(self.censor_char * (self.mask_length or end - start))
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def mask_batch(self, texts):
+        """
+        Mask a whole column in one scan.
+
+        The strings are joined with a row break, masked together and split again, so
+        the per-row overhead is a join and a split. Non-string cells are left as they are.
+
+        :return: A pandas Series aligned with the input if a Series was given, otherwise a list.
+        """
+        values = list(texts)
+        rows = [index for index, text in enumerate(values) if isinstance(text, str)]
+        strings = [values[index] for index in rows]
+        if any(ROW_BREAK in text for text in strings):
+            masked = [self.mask(text) for text in strings]
+        else:
+            masked = self.mask(ROW_BREAK.join(strings)).split(ROW_BREAK) if strings else []
+        for index, text in zip(rows, masked):
+            values[index] = text
+        if isinstance(texts, pd.Series):
+            return pd.Series(values, index=texts.index, name=texts.name)
+        return values
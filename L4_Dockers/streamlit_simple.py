@@ -13,6 +13,8 @@ sys.path.append('/usr/app')
 # Import simple components that work reliably
 from googlereviews import CSVProcessor
 from PII.pii_simple import SimplePIIService
+from profanity_masker.matcher import ProfanityMatcher
+from sentiment_classifier.lexicon import LexiconSentiment
 
 # Simple profanity masker
 class SimpleProfanityMasker:
@@ -25,17 +27,18 @@ class SimpleProfanityMasker:
             'idiot', 'moron', 'dumb', 'hate', 'suck', 'terrible', 'awful',
             'horrible', 'disgusting', 'pathetic', 'worst', 'useless'
         ]
+        # Compiled once: whole words only, leetspeak variants included, casing kept
+        self.matcher = ProfanityMatcher(self.profanity_words)
     
     def mask_profanity(self, text):
         """Mask profanity words with asterisks."""
         if not text:
             return text
-            
-        masked_text = str(text).lower()
-        for word in self.profanity_words:
-            if word in masked_text:
-                masked_text = masked_text.replace(word, '*' * len(word))
-        return masked_text
+        return self.matcher.mask(str(text))
+    
+    def mask_batch(self, texts):
+        """Mask profanity in a whole column in one pass."""
+        return self.matcher.mask_batch(texts)
 
 # Simple sentiment classifier without complex model conversion
 class SimpleSentimentClassifier:
@@ -56,22 +59,19 @@ class SimpleSentimentClassifier:
             'expensive', 'overpriced', 'tasteless', 'cold', 'unfriendly', 'waste',
             'regret', 'avoid', 'never', 'wrong', 'problem', 'complaint'
         ]
+        # Whole words only (so "sad" does not match "crusade"), with negation handling
+        self.engine = LexiconSentiment.from_words(self.positive_words, self.negative_words)
     
     def infer(self, text):
         """Simple sentiment classification based on word matching."""
         if not text or not isinstance(text, str):
             return "UNKNOWN"
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in self.positive_words if word in text_lower)
-        negative_count = sum(1 for word in self.negative_words if word in text_lower)
-        
-        if positive_count > negative_count:
-            return "POSITIVE"
-        elif negative_count > positive_count:
-            return "NEGATIVE"
-        else:
-            return "NEUTRAL"
+        return self.engine.predict(text)[0]
+    
+    def infer_batch(self, texts):
+        """Classify a whole column in one vectorized pass."""
+        labels, _ = self.engine.predict_batch(texts, missing_label="UNKNOWN")
+        return labels
 
 # Streamlit App
 st.set_page_config(layout="wide")
@@ -112,13 +112,7 @@ if uploaded_file is not None:
             progress_bar.progress(30)
             
             pii_service = SimplePIIService()
-            anonymized_texts = []
-            
-            for index, row in df_sample.iterrows():
-                text = str(row.iloc[0])
-                entities = pii_service.analyze_text(text)
-                anonymized_text, _ = pii_service.anonymize_text(text, entities, "replace")
-                anonymized_texts.append(anonymized_text)
+            anonymized_texts = pii_service.anonymize_batch(df_sample.iloc[:, 0].astype(str), "replace").tolist()
             
             df_sample['Anonymized_Text'] = anonymized_texts
             
@@ -127,10 +121,7 @@ if uploaded_file is not None:
             progress_bar.progress(60)
             
             profanity_masker = SimpleProfanityMasker()
-            masked_texts = []
-            for text in anonymized_texts:
-                masked_text = profanity_masker.mask_profanity(text)
-                masked_texts.append(masked_text)
+            masked_texts = profanity_masker.mask_batch(anonymized_texts)
             
             df_sample['Masked_Text'] = masked_texts
             
@@ -139,10 +130,7 @@ if uploaded_file is not None:
             progress_bar.progress(80)
             
             classifier = SimpleSentimentClassifier()
-            sentiments = []
-            for text in masked_texts:
-                sentiment = classifier.infer(text)
-                sentiments.append(sentiment)
+            sentiments = classifier.infer_batch(masked_texts)
             
             df_sample['Sentiment'] = sentiments
             
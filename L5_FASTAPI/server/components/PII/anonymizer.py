@@ -5,6 +5,12 @@ from presidio_anonymizer import AnonymizerEngine, DeanonymizeEngine
 from presidio_anonymizer.operators import Operator, OperatorType
 from presidio_analyzer.nlp_engine import TransformersNlpEngine
 
+try:
+    from .entity_mapping import EntityTypeMapping
+except ImportError:
+    # If relative import fails, try absolute import
+    from entity_mapping import EntityTypeMapping
+
 
 class InstanceCounterAnonymizer(Operator):
     """
@@ -22,25 +28,37 @@ class InstanceCounterAnonymizer(Operator):
         # entity_mapping is a dict of dicts containing mappings per entity type
         entity_mapping: Dict[Dict:str] = params["entity_mapping"]
 
-        entity_mapping_for_type = entity_mapping.get(entity_type)
-        if not entity_mapping_for_type:
-            new_text = self.REPLACING_FORMAT.format(
-                entity_type=entity_type, index=0
-            )
-            entity_mapping[entity_type] = {}
-
+        if hasattr(entity_mapping, "for_type"):
+            # EntityMapping and the persistent mapping stores create the shard on demand
+            entity_mapping_for_type = entity_mapping.for_type(entity_type)
         else:
-            if text in entity_mapping_for_type:
-                return entity_mapping_for_type[text]
-
-            previous_index = self._get_last_index(entity_mapping_for_type)
-            new_text = self.REPLACING_FORMAT.format(
-                entity_type=entity_type, index=previous_index + 1
+            entity_mapping_for_type = entity_mapping.get(entity_type)
+            if entity_mapping_for_type is None:
+                entity_mapping_for_type = entity_mapping[entity_type] = EntityTypeMapping()
+        if hasattr(entity_mapping_for_type, "assign"):
+            # Persistent stores look up and allocate atomically, across processes
+            return entity_mapping_for_type.assign(
+                text, lambda index: self.REPLACING_FORMAT.format(entity_type=entity_type, index=index)
             )
+        if text in entity_mapping_for_type:
+            return entity_mapping_for_type[text]
 
-        entity_mapping[entity_type][text] = new_text
+        new_text = self.REPLACING_FORMAT.format(
+            entity_type=entity_type, index=self._next_index(entity_mapping_for_type)
+        )
+        entity_mapping_for_type[text] = new_text
         return new_text
 
+    @classmethod
+    def _next_index(cls, entity_mapping_for_type: Dict) -> int:
+        """Get the index for a new entity, in O(1) when the mapping carries a counter."""
+        if hasattr(entity_mapping_for_type, "claim_index"):
+            return entity_mapping_for_type.claim_index()
+        # Plain dicts passed in by callers have no counter; fall back to scanning them
+        if not entity_mapping_for_type:
+            return 0
+        return cls._get_last_index(entity_mapping_for_type) + 1
+
     @staticmethod
     def _get_last_index(entity_mapping_for_type: Dict) -> int:
         """Get the last index for a given entity type."""
@@ -62,5 +80,32 @@ class InstanceCounterAnonymizer(Operator):
     def operator_name(self) -> str:
         return "entity_counter"
 
+    def operator_type(self) -> OperatorType:
+        return OperatorType.Anonymize
+
+
+class EntityRecorder(Operator):
+    """
+    Anonymizer which records every entity it replaces and leaves a numbered marker.
+
+    Lets a batch of texts be anonymized before its placeholders exist: the recorded
+    entities are numbered in the order InstanceCounterAnonymizer would have met them
+    (e.g. by SQLiteMappingStore.reserve), and the markers are then replaced.
+    """
+
+    def operate(self, text: str, params: Dict = None) -> str:
+        """Record the entity and return its marker."""
+        entities = params["entities"]
+        entities.append((params["entity_type"], text))
+        return f"{params['marker']}{len(entities) - 1}\x00"
+
+    def validate(self, params: Dict = None) -> None:
+        """Validate operator parameters."""
+        if "entities" not in params or "marker" not in params:
+            raise ValueError("An `entities` list and a `marker` are required.")
+
+    def operator_name(self) -> str:
+        return "entity_recorder"
+
     def operator_type(self) -> OperatorType:
         return OperatorType.Anonymize
\ No newline at end of file
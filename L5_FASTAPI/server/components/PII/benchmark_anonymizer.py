@@ -0,0 +1,27 @@
+import time
+from anonymizer import InstanceCounterAnonymizer
+from entity_mapping import EntityMapping
+
+# Measures the cost of numbering new entities as the mapping grows.
+# With the per-type counter the time per entity stays flat (linear total time);
+# the legacy plain-dict path rescans every placeholder and grows with the mapping.
+
+
+def run(entity_mapping, count, entity_type="PERSON"):
+    anonymizer = InstanceCounterAnonymizer()
+    params = {"entity_type": entity_type, "entity_mapping": entity_mapping}
+    start = time.perf_counter()
+    for i in range(count):
+        anonymizer.operate(f"name {i}", params)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'entities':>10} {'counter (s)':>12} {'us/entity':>10} {'plain dict (s)':>15} {'us/entity':>10}")
+    for count in (1_000, 10_000, 100_000, 1_000_000):
+        counter_time = run(EntityMapping(), count)
+        # A plain per-type dict has no counter and takes the legacy scan, which is quadratic;
+        # only run it where it finishes in reasonable time
+        plain_time = run({"PERSON": {}}, count) if count <= 10_000 else None
+        plain = f"{plain_time:>15.3f} {plain_time / count * 1e6:>10.2f}" if plain_time is not None else f"{'skipped':>15} {'-':>10}"
+        print(f"{count:>10} {counter_time:>12.3f} {counter_time / count * 1e6:>10.2f} {plain}")
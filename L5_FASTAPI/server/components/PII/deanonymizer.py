@@ -22,10 +22,19 @@ class InstanceCounterDeanonymizer(Operator):
 
         if entity_type not in entity_mapping:
             raise ValueError(f"Entity type {entity_type} not found in entity mapping!")
-        if text not in entity_mapping[entity_type].values():
-            raise ValueError(f"Text {text} not found in entity mapping for entity type {entity_type}!")
 
-        return self._find_key_by_value(entity_mapping[entity_type], text)
+        entity_mapping_for_type = entity_mapping[entity_type]
+        if hasattr(entity_mapping_for_type, "original"):
+            # O(1) lookup through the reverse index
+            original = entity_mapping_for_type.original(text)
+        elif text in entity_mapping_for_type.values():
+            # Plain dicts passed in by callers have no reverse index
+            original = self._find_key_by_value(entity_mapping_for_type, text)
+        else:
+            original = None
+        if original is None:
+            raise ValueError(f"Text {text} not found in entity mapping for entity type {entity_type}!")
+        return original
 
     @staticmethod
     def _find_key_by_value(entity_mapping, value):
@@ -0,0 +1,102 @@
+import re
+from typing import Dict, Optional
+
+# Matches <TYPE_n> placeholders; the type may itself contain underscores (EMAIL_ADDRESS)
+PLACEHOLDER_PATTERN = re.compile(r"<([A-Z][A-Z0-9_]*)_(\d+)>")
+
+
+class EntityTypeMapping(dict):
+    """
+    Mapping of original text -> placeholder for a single entity type.
+
+    Carries the next free placeholder index so a new entity is numbered in O(1)
+    instead of scanning every existing placeholder, and a reverse index
+    (placeholder -> original text) so deanonymization is O(1) per placeholder.
+    """
+
+    __slots__ = ("next_index", "reverse")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.next_index = 0
+        self.reverse = {}
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, text: str, placeholder: str) -> None:
+        previous = self.get(text)
+        if previous is not None:
+            self.reverse.pop(previous, None)
+        super().__setitem__(text, placeholder)
+        self.reverse[placeholder] = text
+
+    def __delitem__(self, text: str) -> None:
+        self.reverse.pop(self[text], None)
+        super().__delitem__(text)
+
+    def update(self, *args, **kwargs) -> None:
+        for text, placeholder in dict(*args, **kwargs).items():
+            self[text] = placeholder
+
+    def __reduce__(self):
+        # dict subclasses with __slots__ need help to pickle the counter and reverse index
+        return self._restore, (dict(self), self.next_index)
+
+    @classmethod
+    def _restore(cls, items: Dict[str, str], next_index: int) -> "EntityTypeMapping":
+        mapping = cls(items)
+        mapping.next_index = next_index
+        return mapping
+
+    def original(self, placeholder: str) -> Optional[str]:
+        """Return the original text for a placeholder, or None if unknown."""
+        return self.reverse.get(placeholder)
+
+    def claim_index(self) -> int:
+        """Return the next placeholder index and advance the counter."""
+        index = self.next_index
+        self.next_index += 1
+        return index
+
+
+class EntityMapping(dict):
+    """
+    Dict of dicts {entity_type: {original_text: placeholder}} shared by the
+    instance counter anonymizer and deanonymizer.
+
+    It behaves like the plain nested dict the operators have always used, but each
+    entity type is an EntityTypeMapping that tracks its own counter.
+    """
+
+    def for_type(self, entity_type: str) -> EntityTypeMapping:
+        """Return the mapping for an entity type, creating it if needed."""
+        mapping = self.get(entity_type)
+        if mapping is None:
+            mapping = self[entity_type] = EntityTypeMapping()
+        return mapping
+
+    def deanonymize(self, text: str) -> str:
+        """Replace every known <TYPE_n> placeholder in a string; unknown ones are kept."""
+
+        def replace(match):
+            mapping = self.get(match.group(1))
+            original = mapping.original(match.group(0)) if mapping is not None else None
+            return match.group(0) if original is None else original
+
+        return PLACEHOLDER_PATTERN.sub(replace, text)
+
+    def flush(self) -> None:
+        """Nothing to persist for the in-memory mapping."""
+
+    def close(self) -> None:
+        """Nothing to release for the in-memory mapping."""
+
+    @classmethod
+    def from_dict(cls, entity_mapping: Optional[Dict[str, Dict[str, str]]]) -> "EntityMapping":
+        """Build an EntityMapping from a plain nested dict, restoring the counters."""
+        result = cls()
+        for entity_type, values in (entity_mapping or {}).items():
+            mapping = result.for_type(entity_type)
+            mapping.update(values)
+            if values:
+                mapping.next_index = max(int(v.split("_")[-1][:-1]) for v in values.values()) + 1
+        return result
@@ -0,0 +1,348 @@
+import re
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .entity_mapping import EntityMapping, PLACEHOLDER_PATTERN
+except ImportError:
+    # If relative import fails, try absolute import
+    from entity_mapping import EntityMapping, PLACEHOLDER_PATTERN
+
+
+class LRUCache:
+    """Small bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+class SQLiteTypeShard:
+    """
+    Mapping of original text -> placeholder for one entity type, stored in its own
+    SQLite file.
+
+    Implements the parts of the dict protocol used by the instance counter operators
+    (`in`, `[]`, assignment, `assign`, `original`). New placeholders are allocated by
+    `assign_many` inside a write transaction that reads and bumps a one-row counter,
+    so processes sharing the file never hand out the same index or map one text twice,
+    and allocation stays O(1) however many entities the file holds. Explicit
+    assignments are buffered and committed in batches with a plain INSERT, so a
+    conflict raises instead of replacing another process's row. Reads go through
+    bounded LRU caches and a memory-mapped database file.
+    """
+
+    def __init__(self, path: Path, cache_size: int = 100_000, write_batch: int = 1_000,
+                 mmap_size: int = 256 * 1024 * 1024):
+        self.path = path
+        self.write_batch = write_batch
+        self._lock = threading.RLock()
+        # Writers in other processes hold the database lock briefly; wait for it
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entities ("
+            "text TEXT PRIMARY KEY, placeholder TEXT NOT NULL UNIQUE, idx INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS entities_idx ON entities (idx)")
+        # Next free index; files written before the counter existed start after their MAX(idx)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counter (next_idx INTEGER NOT NULL)")
+        self._conn.commit()
+        with self._transaction():
+            if self._conn.execute("SELECT 1 FROM counter").fetchone() is None:
+                self._conn.execute("INSERT INTO counter (next_idx) SELECT COALESCE(MAX(idx) + 1, 0) FROM entities")
+        self._forward = LRUCache(cache_size)
+        self._reverse = LRUCache(cache_size)
+        # Assignments not yet committed; always consulted before the database
+        self._pending: Dict[str, Tuple[str, int]] = {}
+        self._pending_reverse: Dict[str, str] = {}
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE takes the database write lock, so no other process writes in between"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def assign(self, text: str, make_placeholder: Callable[[int], str]) -> str:
+        """Return the placeholder of text, allocating the next index if it has none."""
+        return self.assign_many([text], make_placeholder)[0]
+
+    def assign_many(self, texts: List[str], make_placeholder: Callable[[int], str]) -> List[str]:
+        """
+        Return the placeholder of every text, allocating indexes for new ones in order.
+
+        New texts are looked up again, numbered from the counter and inserted in one
+        transaction per `write_batch` texts, so a batch of entities costs a single
+        commit and another process cannot allocate the same index, or map the same
+        text, in between.
+
+        :param make_placeholder: Builds the placeholder for a new index.
+        :return: One placeholder per text, in input order.
+        """
+        placeholders = {}
+        new = []
+        for text in dict.fromkeys(texts):
+            placeholder = self.get(text)
+            if placeholder is None:
+                new.append(text)
+            else:
+                placeholders[text] = placeholder
+        with self._lock:
+            if new:
+                # Buffered rows must be in the database before the counter is read
+                self.flush()
+            for start in range(0, len(new), self.write_batch):
+                with self._transaction():
+                    rows = []
+                    index = self._conn.execute("SELECT next_idx FROM counter").fetchone()[0]
+                    for text in new[start:start + self.write_batch]:
+                        # Another process may have mapped it since the lookup above
+                        row = self._conn.execute("SELECT placeholder FROM entities WHERE text = ?", (text,)).fetchone()
+                        if row is not None:
+                            placeholders[text] = row[0]
+                            continue
+                        placeholders[text] = make_placeholder(index)
+                        rows.append((text, placeholders[text], index))
+                        index += 1
+                    self._conn.executemany("INSERT INTO entities (text, placeholder, idx) VALUES (?, ?, ?)", rows)
+                    self._conn.execute("UPDATE counter SET next_idx = ?", (index,))
+            for text in new:
+                self._forward.put(text, placeholders[text])
+                self._reverse.put(placeholders[text], text)
+        return [placeholders[text] for text in texts]
+
+    def get(self, text: str, default=None) -> Optional[str]:
+        with self._lock:
+            placeholder = self._forward.get(text)
+            if placeholder is not None:
+                return placeholder
+            pending = self._pending.get(text)
+            if pending is not None:
+                return pending[0]
+            row = self._conn.execute("SELECT placeholder FROM entities WHERE text = ?", (text,)).fetchone()
+            if row is None:
+                return default
+            self._forward.put(text, row[0])
+            return row[0]
+
+    def original(self, placeholder: str) -> Optional[str]:
+        """Return the original text for a placeholder, or None if unknown."""
+        with self._lock:
+            text = self._reverse.get(placeholder)
+            if text is not None:
+                return text
+            text = self._pending_reverse.get(placeholder)
+            if text is not None:
+                return text
+            row = self._conn.execute("SELECT text FROM entities WHERE placeholder = ?", (placeholder,)).fetchone()
+            if row is None:
+                return None
+            self._reverse.put(placeholder, row[0])
+            return row[0]
+
+    def __contains__(self, text: str) -> bool:
+        return self.get(text) is not None
+
+    def __getitem__(self, text: str) -> str:
+        placeholder = self.get(text)
+        if placeholder is None:
+            raise KeyError(text)
+        return placeholder
+
+    def __setitem__(self, text: str, placeholder: str) -> None:
+        index = int(placeholder.split("_")[-1][:-1])
+        with self._lock:
+            self._pending[text] = (placeholder, index)
+            self._pending_reverse[placeholder] = text
+            self._forward.put(text, placeholder)
+            self._reverse.put(placeholder, text)
+            if len(self._pending) >= self.write_batch:
+                self.flush()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute("SELECT text, placeholder FROM entities ORDER BY idx").fetchall()
+        return iter(rows)
+
+    def values(self) -> Iterator[str]:
+        return (placeholder for _, placeholder in self.items())
+
+    def flush(self) -> None:
+        """Commit buffered assignments so other processes can read them."""
+        with self._lock:
+            if not self._pending:
+                return
+            # Plain INSERT: a text, placeholder or index taken by another process raises
+            # sqlite3.IntegrityError instead of silently deleting that process's row
+            try:
+                with self._transaction():
+                    self._conn.executemany(
+                        "INSERT INTO entities (text, placeholder, idx) VALUES (?, ?, ?)",
+                        [(text, placeholder, index) for text, (placeholder, index) in self._pending.items()],
+                    )
+                    # Keep the counter past explicitly numbered rows
+                    self._conn.execute(
+                        "UPDATE counter SET next_idx = MAX(next_idx, ?)",
+                        (max(index for _, index in self._pending.values()) + 1,),
+                    )
+            except sqlite3.IntegrityError:
+                # Drop the rejected batch, and the cached copies of it, so the
+                # database stays the only source of truth
+                self._forward = LRUCache(self._forward.max_size)
+                self._reverse = LRUCache(self._reverse.max_size)
+                raise
+            finally:
+                self._pending.clear()
+                self._pending_reverse.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+class SQLiteMappingStore:
+    """
+    Persistent entity mapping sharded by entity type: one SQLite file per type
+    under `directory`.
+
+    Drop-in replacement for EntityMapping in TextAnalyzerService. Mappings survive
+    restarts and any process opening the same directory can deanonymize. Several
+    processes may anonymize into the same directory: placeholders allocated with
+    `assign` or `reserve` are committed immediately and are unique across all of them.
+    """
+
+    def __init__(self, directory, cache_size: int = 100_000, write_batch: int = 1_000,
+                 mmap_size: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+        self.write_batch = write_batch
+        self.mmap_size = mmap_size
+        self._shards: Dict[str, SQLiteTypeShard] = {}
+        self._lock = threading.Lock()
+        # Identifies this vault across restarts (e.g. in result cache keys); a new
+        # directory gets a new id, so nothing cached against an old vault matches it
+        id_path = self.directory / "store_id"
+        if not id_path.exists():
+            id_path.write_text(uuid.uuid4().hex)
+        self.store_id = id_path.read_text().strip()
+
+    def _shard_path(self, entity_type: str) -> Path:
+        return self.directory / f"{entity_type}.sqlite"
+
+    def for_type(self, entity_type: str) -> SQLiteTypeShard:
+        """Return the shard for an entity type, creating its file if needed."""
+        with self._lock:
+            shard = self._shards.get(entity_type)
+            if shard is None:
+                if not re.fullmatch(r"[A-Za-z0-9_]+", entity_type):
+                    raise ValueError(f"Invalid entity type {entity_type!r}")
+                shard = self._shards[entity_type] = SQLiteTypeShard(
+                    self._shard_path(entity_type), self.cache_size, self.write_batch, self.mmap_size
+                )
+            return shard
+
+    def get(self, entity_type: str, default=None):
+        if entity_type in self:
+            return self.for_type(entity_type)
+        return default
+
+    def __contains__(self, entity_type: str) -> bool:
+        return entity_type in self._shards or self._shard_path(entity_type).exists()
+
+    def __getitem__(self, entity_type: str) -> SQLiteTypeShard:
+        if entity_type not in self:
+            raise KeyError(entity_type)
+        return self.for_type(entity_type)
+
+    def keys(self):
+        return sorted(path.stem for path in self.directory.glob("*.sqlite"))
+
+    def reserve(self, entities: Iterable[Tuple[str, str]], replacing_format: str) -> List[str]:
+        """
+        Allocate placeholders for (entity_type, text) pairs with one transaction per type.
+
+        Indexes are assigned in the order the pairs are given, as repeated `assign`
+        calls would, but a whole batch of texts costs one commit per entity type.
+
+        :param replacing_format: Placeholder format with {entity_type} and {index} fields.
+        :return: One placeholder per pair, in input order.
+        """
+        by_type: Dict[str, List[Tuple[int, str]]] = {}
+        for position, (entity_type, text) in enumerate(entities):
+            by_type.setdefault(entity_type, []).append((position, text))
+        placeholders = [None] * sum(len(items) for items in by_type.values())
+        for entity_type, items in by_type.items():
+            assigned = self.for_type(entity_type).assign_many(
+                [text for _, text in items],
+                lambda index, entity_type=entity_type: replacing_format.format(entity_type=entity_type, index=index),
+            )
+            for (position, _), placeholder in zip(items, assigned):
+                placeholders[position] = placeholder
+        return placeholders
+
+    def deanonymize(self, text: str) -> str:
+        """Replace every known <TYPE_n> placeholder in a string; unknown ones are kept."""
+
+        def replace(match):
+            shard = self.get(match.group(1))
+            original = shard.original(match.group(0)) if shard is not None else None
+            return match.group(0) if original is None else original
+
+        return PLACEHOLDER_PATTERN.sub(replace, text)
+
+    def flush(self) -> None:
+        for shard in list(self._shards.values()):
+            shard.flush()
+
+    def close(self) -> None:
+        for shard in list(self._shards.values()):
+            shard.close()
+        self._shards.clear()
+
+
+def create_mapping_store(url: Optional[str] = None, **kwargs):
+    """
+    Build an entity mapping store from a URL.
+
+    :param url: "memory" (default) for an in-process EntityMapping, or
+                "sqlite:///path/to/dir" for a SQLiteMappingStore sharded by entity type.
+    :param kwargs: Extra options for the SQLite store (cache_size, write_batch, mmap_size).
+    """
+    if not url or url == "memory":
+        return EntityMapping()
+    if url.startswith("sqlite:///"):
+        return SQLiteMappingStore(url[len("sqlite:///"):], **kwargs)
+    raise ValueError(f"Unsupported mapping store {url!r}, expected 'memory' or 'sqlite:///<dir>'")
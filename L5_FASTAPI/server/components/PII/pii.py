@@ -1,23 +1,32 @@
 from presidio_anonymizer import AnonymizerEngine, DeanonymizeEngine
+from presidio_anonymizer.entities import OperatorConfig
 from presidio_anonymizer.operators import Operator, OperatorType
 from pprint import pprint
 from presidio_analyzer.nlp_engine import TransformersNlpEngine
 from presidio_analyzer import (
     AnalyzerEngine,
+    BatchAnalyzerEngine,
     RecognizerResult,
     RecognizerRegistry,
     PatternRecognizer,
     Pattern,
 )
 from typing import List, Optional, Tuple, Dict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import re
+import threading
+import uuid
 
 try:
     from .deanonymizer import InstanceCounterDeanonymizer
-    from .anonymizer import InstanceCounterAnonymizer
+    from .anonymizer import InstanceCounterAnonymizer, EntityRecorder
+    from .entity_mapping import EntityMapping
 except ImportError:
     # If relative import fails, try absolute import
     from deanonymizer import InstanceCounterDeanonymizer
-    from anonymizer import InstanceCounterAnonymizer
+    from anonymizer import InstanceCounterAnonymizer, EntityRecorder
+    from entity_mapping import EntityMapping
 
 
 class TextAnalyzerService:
@@ -25,17 +34,64 @@ class TextAnalyzerService:
     A service class for text analysis, anonymization, and deanonymization.
     """
 
-    def __init__(self, model_choice: str = "obi/deid_roberta_i2b2"):
+    def __init__(
+        self,
+        model_choice: str = "obi/deid_roberta_i2b2",
+        load_nlp: bool = True,
+        batch_size: int = 32,
+        entity_mapping=None,
+        result_cache=None,
+        scheduler=None,
+    ):
         """
         Initialize the TextAnalyzerService with a specified transformer model.
 
         :param model_choice: The transformer model to use for analysis. Defaults to "obi/deid_roberta_i2b2".
+        :param load_nlp: Load the NLP models. Pass False for a service that only anonymizes
+                         results produced elsewhere (e.g. by worker processes).
+        :param batch_size: Texts per nlp.pipe batch in analyze_batch.
+        :param entity_mapping: Store for the <TYPE_n> placeholders, e.g. a SQLiteMappingStore
+                               from create_mapping_store. Defaults to an in-memory EntityMapping.
+        :param result_cache: Optional ResultCache; texts anonymized before (with the same
+                             model, operator and entity mapping) are not analyzed again.
+        :param scheduler: Optional TokenBudgetScheduler; analyze_batch then groups texts of
+                          similar length under a token budget instead of fixed-size batches.
         """
-        # Simplified initialization for newer presidio version
-        self.analyzer = AnalyzerEngine()
+        self.model_choice = model_choice
+        self.batch_size = batch_size
+        self.analyzer = self._create_analyzer(model_choice) if load_nlp else None
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer) if load_nlp else None
         self.anonymizer = AnonymizerEngine()
+        self.anonymizer.add_anonymizer(InstanceCounterAnonymizer)
+        self.anonymizer.add_anonymizer(EntityRecorder)
         self.deanonymizer_engine = DeanonymizeEngine()
-        self.entity_mapping = dict()
+        self.deanonymizer_engine.add_deanonymizer(InstanceCounterDeanonymizer)
+        self.entity_mapping = EntityMapping() if entity_mapping is None else entity_mapping
+        self.result_cache = result_cache
+        self.scheduler = scheduler
+        # Cached placeholders are only valid for the mapping that issued them: a persistent
+        # store has a stable id, an in-memory mapping lives as long as this instance
+        self._mapping_id = getattr(self.entity_mapping, "store_id", None) or uuid.uuid4().hex
+        # Guards entity_mapping so <TYPE_n> numbering stays consistent across threads
+        self._mapping_lock = threading.Lock()
+        self._pool = None
+        self._pool_processes = None
+
+    @staticmethod
+    def _create_analyzer(model_choice: str) -> AnalyzerEngine:
+        """Build the analyzer on the transformer NER model, falling back to the default spaCy engine"""
+        try:
+            model_config = [
+                {
+                    "lang_code": "en",
+                    "model_name": {"spacy": "en_core_web_sm", "transformers": model_choice},
+                }
+            ]
+            nlp_engine = TransformersNlpEngine(models=model_config)
+            return AnalyzerEngine(nlp_engine=nlp_engine)
+        except Exception as e:
+            print(f"Could not load transformer model {model_choice}, using the default analyzer: {e}")
+            return AnalyzerEngine()
 
     def analyze_text(self, text: str) -> List[RecognizerResult]:
         """
@@ -51,6 +107,40 @@ class TextAnalyzerService:
             print(f"An error occurred during text analysis: {e}")
             return []
 
+    def analyze_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[RecognizerResult]]:
+        """
+        Analyze many texts at once through spaCy's nlp.pipe and Presidio's batch analyzer.
+
+        The NLP models (including the transformer NER) see whole batches instead of single
+        reviews; the recognizers then run per text, so results match analyze_text.
+
+        :param texts: The texts to analyze.
+        :param batch_size: Texts per nlp.pipe batch. Defaults to self.batch_size.
+        :return: One list of RecognizerResult per input text.
+        """
+        results = [[] for _ in texts]
+        # analyze_text yields no entities for non-string cells (e.g. NaN), keep that behaviour
+        indices = [index for index, text in enumerate(texts) if isinstance(text, str)]
+        try:
+            if self.scheduler is not None:
+                # The transformer pads each nlp.pipe batch to its longest text
+                batch_results = self.scheduler.run(
+                    [texts[index] for index in indices],
+                    lambda batch: self.batch_analyzer.analyze_iterator(batch, language="en", batch_size=len(batch)),
+                )
+            else:
+                batch_results = self.batch_analyzer.analyze_iterator(
+                    [texts[index] for index in indices],
+                    language="en",
+                    batch_size=batch_size or self.batch_size,
+                )
+        except Exception as e:
+            print(f"An error occurred during batch text analysis, analyzing one by one: {e}")
+            batch_results = [self.analyze_text(texts[index]) for index in indices]
+        for index, text_results in zip(indices, batch_results):
+            results[index] = text_results
+        return results
+
     def anonymize_text(
         self,
         text: str,
@@ -87,11 +177,16 @@ class TextAnalyzerService:
             operator_config = {"lambda": lambda x: x}
 
         try:
-            # Use built-in anonymization with default operators
-            res = self.anonymizer.anonymize(
-                text,
-                analyze_results
-            )
+            with self._mapping_lock:
+                res = self.anonymizer.anonymize(
+                    text,
+                    analyze_results,
+                    {
+                        "DEFAULT": OperatorConfig(
+                            "entity_counter", {"entity_mapping": self.entity_mapping}
+                        )
+                    },
+                )
             return res, self.entity_mapping
         except Exception as e:
             print(f"An error occurred during text anonymization: {e}")
@@ -104,6 +199,211 @@ class TextAnalyzerService:
         :param anonymized_result: The anonymized text result.
         :return: The deanonymized text.
         """
-        # Simple deanonymization - just return the anonymized text since 
-        # built-in operators don't support complex deanonymization
-        return anonymized_result
+        deanonymized = self.deanonymizer_engine.deanonymize(
+            anonymized_result.text,
+            anonymized_result.items,
+            {
+                "DEFAULT": OperatorConfig(
+                    "entity_counter_deanonymizer",
+                    params={"entity_mapping": self.entity_mapping},
+                )
+            },
+        )
+        return deanonymized
+
+    def deanonymize_batch(self, anonymized_texts: List[str]) -> List[str]:
+        """
+        Deanonymize a whole column of anonymized strings.
+
+        Placeholders are resolved through the entity mapping's reverse index, so the
+        cost is linear in the text length and independent of the number of entities.
+        Placeholders that are not in the mapping are left unchanged.
+
+        :param anonymized_texts: Anonymized texts, e.g. the Anonymized_Text column.
+        :return: The deanonymized texts, in input order.
+        """
+        return [
+            self.entity_mapping.deanonymize(text) if isinstance(text, str) else text
+            for text in anonymized_texts
+        ]
+
+    def anonymize_texts(self, texts: List[str], operator: str = "encrypt") -> List[str]:
+        """
+        Analyze and anonymize a list of texts sequentially.
+
+        :param texts: The texts to anonymize.
+        :param operator: The anonymization operator to use.
+        :return: The anonymized texts, in input order.
+        """
+        return self.anonymize_batch(texts, operator=operator)
+
+    def anonymize_batch(
+        self, texts: List[str], batch_size: Optional[int] = None, operator: str = "encrypt"
+    ) -> List[str]:
+        """
+        Analyze texts in batches (see analyze_batch) and anonymize them in input order.
+
+        :param texts: The texts to anonymize.
+        :param batch_size: Texts per nlp.pipe batch. Defaults to self.batch_size.
+        :param operator: The anonymization operator to use.
+        :return: The anonymized texts, in input order.
+        """
+        def anonymize(texts):
+            return self.anonymize_analyzed(texts, self.analyze_batch(texts, batch_size), operator)
+
+        return self._anonymize_cached(texts, operator, anonymize)
+
+    def anonymize_analyzed(
+        self, texts: List[str], analyze_results: List[List[RecognizerResult]], operator: str = "encrypt"
+    ) -> List[str]:
+        """
+        Anonymize texts whose entities were already found, numbering entities in input order.
+
+        :param texts: The texts to anonymize.
+        :param analyze_results: One list of RecognizerResult (or serialized tuples) per text.
+        :param operator: The anonymization operator to use.
+        :return: The anonymized texts, in input order.
+        """
+        analyze_results = [
+            [result if isinstance(result, RecognizerResult) else RecognizerResult(*result) for result in results]
+            for results in analyze_results
+        ]
+        if hasattr(self.entity_mapping, "reserve"):
+            anonymized_texts = self._anonymize_reserved(texts, analyze_results)
+        else:
+            anonymized_texts = []
+            for text, results in zip(texts, analyze_results):
+                anonymized_text, _ = self.anonymize_text(text, results, operator=operator)
+                # anonymize_text returns an EngineResult on success and "" on failure
+                anonymized_texts.append(getattr(anonymized_text, "text", anonymized_text))
+        self.flush_mapping()
+        if self.result_cache is not None:
+            # An empty result for a non-empty text is a failed anonymization, never cache it
+            self.result_cache.store("anonymize", self.cache_version(operator), {
+                text: anonymized_text
+                for text, anonymized_text in zip(texts, anonymized_texts)
+                if anonymized_text or not text
+            })
+        return anonymized_texts
+
+    def _anonymize_reserved(self, texts: List[str], analyze_results: List[List[RecognizerResult]]) -> List[str]:
+        """
+        Anonymize a batch with one placeholder allocation per entity type.
+
+        The texts are anonymized with numbered markers first, recording the entities in
+        the order the instance counter would see them; the store then allocates all
+        their placeholders at once and the markers are replaced.
+        """
+        entities = []
+        marker = f"\x00{uuid.uuid4().hex}:"
+        marked_texts = []
+        for text, results in zip(texts, analyze_results):
+            try:
+                marked = self.anonymizer.anonymize(
+                    text,
+                    results,
+                    {"DEFAULT": OperatorConfig("entity_recorder", {"entities": entities, "marker": marker})},
+                )
+                marked_texts.append(marked.text)
+            except Exception as e:
+                print(f"An error occurred during text anonymization: {e}")
+                marked_texts.append("")
+        with self._mapping_lock:
+            placeholders = self.entity_mapping.reserve(entities, InstanceCounterAnonymizer.REPLACING_FORMAT)
+        pattern = re.compile(re.escape(marker) + r"(\d+)\x00")
+        return [pattern.sub(lambda match: placeholders[int(match.group(1))], text) for text in marked_texts]
+
+    def cache_version(self, operator: str = "encrypt") -> str:
+        """Everything besides the text that determines an anonymized output, for result cache keys"""
+        return f"{self.model_choice}|{operator}|{self._mapping_id}"
+
+    def lookup_anonymized(self, texts: List[str], operator: str = "encrypt") -> Tuple[Dict[str, str], List[str]]:
+        """
+        Split texts into cached anonymized outputs and texts that still need analysis.
+
+        :return: A dict of text -> anonymized text for the hits, and the distinct texts
+                 to analyze and pass to anonymize_analyzed (which caches their results).
+        """
+        if self.result_cache is None:
+            return {}, list(dict.fromkeys(texts))
+        return self.result_cache.lookup("anonymize", self.cache_version(operator), texts)
+
+    def _anonymize_cached(self, texts: List[str], operator: str, anonymize) -> List[str]:
+        if self.result_cache is None:
+            return anonymize(texts)
+        found, missing = self.lookup_anonymized(texts, operator)
+        if missing:
+            found.update(zip(missing, anonymize(missing)))
+        return [found[text] for text in texts]
+
+    def flush_mapping(self) -> None:
+        """Make new placeholders visible to other processes sharing a persistent store"""
+        flush = getattr(self.entity_mapping, "flush", None)
+        if flush is not None:
+            with self._mapping_lock:
+                flush()
+
+    def anonymize_texts_parallel(
+        self, texts: List[str], processes: Optional[int] = None, shard_size: int = 64, operator: str = "encrypt"
+    ) -> List[str]:
+        """
+        Anonymize a list of texts with the analysis sharded across worker processes.
+
+        Each worker loads the NLP models once and only finds entities. The <TYPE_n>
+        numbering is then assigned here, shard by shard in input order, so the output
+        and entity_mapping are identical to anonymize_texts.
+
+        :param texts: The texts to anonymize.
+        :param processes: Worker processes. Defaults to the number of CPUs.
+        :param shard_size: Texts sent to a worker per task.
+        :param operator: The anonymization operator to use.
+        :return: The anonymized texts, in input order.
+        """
+        def anonymize(texts):
+            pool = self._get_pool(processes)
+            shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+            anonymized_texts = []
+            # map() yields shard results in submission order even though workers finish out of order
+            for shard, shard_results in zip(shards, pool.map(_analyze_shard, shards)):
+                anonymized_texts.extend(self.anonymize_analyzed(shard, shard_results, operator))
+            return anonymized_texts
+
+        return self._anonymize_cached(texts, operator, anonymize)
+
+    @staticmethod
+    def serialize_results(results: List[RecognizerResult]) -> List[Tuple[str, int, int, float]]:
+        """Reduce RecognizerResults to picklable (entity_type, start, end, score) tuples"""
+        return [(result.entity_type, result.start, result.end, result.score) for result in results]
+
+    def close(self) -> None:
+        """Shut down the worker processes started by anonymize_texts_parallel and flush the mapping"""
+        self.flush_mapping()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._pool_processes = None
+
+    def _get_pool(self, processes: Optional[int]) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool_processes != processes:
+            self.close()
+            self._pool_processes = processes
+            self._pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_analyzer_worker,
+                initargs=(self.model_choice,),
+            )
+        return self._pool
+
+
+# Per-process service used by the anonymize_texts_parallel workers
+_worker_service: Optional[TextAnalyzerService] = None
+
+
+def _init_analyzer_worker(model_choice: str) -> None:
+    global _worker_service
+    _worker_service = TextAnalyzerService(model_choice=model_choice)
+
+
+def _analyze_shard(texts: List[str]) -> List[List[Tuple[str, int, int, float]]]:
+    return [TextAnalyzerService.serialize_results(results) for results in _worker_service.analyze_batch(texts)]
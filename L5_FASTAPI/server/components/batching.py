@@ -0,0 +1,90 @@
+import threading
+
+
+def approx_tokens(text):
+    """Rough subword count (about four characters per token) for models whose tokenizer is not at hand"""
+    return len(text) // 4 + 1
+
+
+class TokenBudgetScheduler:
+    """
+    Groups sequences of similar length into batches under a token budget.
+
+    A padded batch costs len(batch) * longest sequence. Sorting by length before
+    batching keeps short reviews out of batches with long ones, and the budget lets
+    batches of short reviews grow large while long reviews go through a few at a time.
+    Results are handed back in the original order.
+
+    `stats()` reports how much of the computed batches was padding, next to what
+    fixed-size batches in input order would have padded.
+    """
+
+    def __init__(self, max_tokens=8192, max_batch_size=64):
+        """
+        :param max_tokens: Upper bound on len(batch) * longest sequence in the batch.
+                           A single sequence longer than this still forms its own batch.
+        :param max_batch_size: Upper bound on sequences per batch.
+        """
+        self.max_tokens = max_tokens
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "sequences": 0, "tokens": 0, "padded_tokens": 0, "naive_padded_tokens": 0}
+
+    def plan(self, lengths):
+        """
+        Split sequence positions into batches.
+
+        :param lengths: Token count of every sequence.
+        :return: Lists of positions into `lengths`, each list one batch in ascending length.
+        """
+        order = sorted(range(len(lengths)), key=lengths.__getitem__)
+        batches = []
+        batch = []
+        for index in order:
+            # Sorted ascending, so the newest sequence is the longest in its batch
+            if batch and (len(batch) >= self.max_batch_size or (len(batch) + 1) * lengths[index] > self.max_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(index)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def run(self, items, fn, lengths=None):
+        """
+        Apply fn batch by batch and return its per-item results in input order.
+
+        :param items: The sequences (token id lists, or texts).
+        :param fn: Called with a list of items; returns one result per item, in order.
+        :param lengths: Token count of every item. Defaults to approx_tokens of each text.
+        """
+        if lengths is None:
+            lengths = [approx_tokens(item) for item in items]
+        results = [None] * len(items)
+        batches = self.plan(lengths)
+        for batch in batches:
+            for index, result in zip(batch, fn([items[index] for index in batch])):
+                results[index] = result
+        self.record(lengths, batches)
+        return results
+
+    def record(self, lengths, batches):
+        """Add batches from plan(lengths) that the caller ran itself to the padding statistics"""
+        padded = sum(len(batch) * lengths[batch[-1]] for batch in batches)
+        # Fixed-size batches in input order, the way the stages batched before
+        chunks = (lengths[start:start + self.max_batch_size] for start in range(0, len(lengths), self.max_batch_size))
+        naive = sum(len(chunk) * max(chunk) for chunk in chunks)
+        with self._lock:
+            self._stats["batches"] += len(batches)
+            self._stats["sequences"] += len(lengths)
+            self._stats["tokens"] += sum(lengths)
+            self._stats["padded_tokens"] += padded
+            self._stats["naive_padded_tokens"] += naive
+
+    def stats(self):
+        """Totals since creation, with padding waste as the fraction of computed tokens that were padding"""
+        with self._lock:
+            stats = dict(self._stats)
+        for name, padded in (("padding_waste", "padded_tokens"), ("naive_padding_waste", "naive_padded_tokens")):
+            stats[name] = round(1 - stats["tokens"] / stats[padded], 4) if stats[padded] else None
+        return stats
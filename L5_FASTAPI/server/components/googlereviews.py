@@ -13,6 +13,14 @@ class CSVProcessor:
         # Save the updated DataFrame to a new CSV file
         self.df.to_csv(output_file_path, index=False)
         
+    @staticmethod
+    def iter_chunks(csv_file_path, chunksize, columns_to_drop=None):
+        # Read the file lazily, chunksize rows at a time, for files that do not fit in memory
+        for chunk in pd.read_csv(csv_file_path, chunksize=chunksize):
+            if columns_to_drop:
+                chunk.drop(columns=columns_to_drop, inplace=True)
+            yield chunk
+
     def get_dataframe(self):
         # Assuming the processed CSV is saved in a variable or a file
         # Read the processed CSV file back into a DataFrame
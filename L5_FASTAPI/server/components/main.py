@@ -1,76 +1,98 @@
-from googlereviews import CSVProcessor
-import pandas as pd
-from PII.pii import TextAnalyzerService
-from profanity_masker.main import profanity_masker
-from sentiment_classifier.main import TextClassifier
+import argparse
+import os
 import time
-# Step 1: Use CSVProcessor to drop columns and save the processed file
+from pipeline import Pipeline
+from result_cache import create_result_cache
+from token_cache import TokenCache
+
+parser = argparse.ArgumentParser(description="Run the review pipeline: CSV processing, PII anonymization, profanity masking and sentiment classification")
+parser.add_argument("--input", default="reviews.csv", help="Reviews CSV file")
+parser.add_argument("--output", default="output_classified.csv", help="Classified output CSV file")
+parser.add_argument("--materialize", nargs="*", metavar="STAGE",
+                    help="Also save intermediate stage outputs (all stages when no names are given)")
+parser.add_argument("--materialize-format", default="csv", choices=["parquet", "feather", "csv"],
+                    help="Format of intermediate stage outputs; parquet and feather need pyarrow, --stream needs csv")
+parser.add_argument("--output-dir", default=".", help="Directory for intermediate stage outputs")
+parser.add_argument("--stream", action="store_true",
+                    help="Process the input in chunks and append results incrementally, for files larger than RAM")
+parser.add_argument("--chunksize", type=int, default=10_000, help="Rows per chunk in streaming mode")
+parser.add_argument("--pii-processes", type=int, default=None,
+                    help="Shard PII analysis across this many processes (placeholders match the sequential run)")
+parser.add_argument("--result-cache", default="off",
+                    help='Cache per-review results: "off", "memory" or "sqlite:///<file>" to reuse them across runs')
+parser.add_argument("--max-tokens", type=int, default=8192,
+                    help="Token budget per transformer batch; reviews of similar length are batched together (0 disables)")
+parser.add_argument("--precision", default="fp32", choices=["fp32", "int8"],
+                    help="Classifier precision; int8 is quantized on --calibration-file on first use and cached")
+parser.add_argument("--calibration-file",
+                    default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "calibration_reviews.csv"),
+                    help="Fixed reviews CSV to build the INT8 classifier from (an existing INT8 model is kept)")
+parser.add_argument("--throughput", action="store_true",
+                    help="Keep several classifier batches in flight at once (OpenVINO throughput mode)")
+parser.add_argument("--cascade", action="store_true",
+                    help="Classify with the lexicon model first and run the transformer only on uncertain reviews")
+parser.add_argument("--token-cache", default=None, metavar="DIR",
+                    help="Keep token ids in memory-mapped files under DIR so re-runs skip tokenization")
+parser.add_argument("--long-reviews", default="truncate", choices=["truncate", "window"],
+                    help="Cut long reviews at the model limit, or classify them in overlapping windows")
+args = parser.parse_args()
+
+# Stage outputs are passed in memory; intermediate files are only written on request
+materialize = None
+if args.materialize is not None:
+    materialize = args.materialize or True
+
+# Shared by all stages; with a SQLite file, re-runs over the same reviews skip the models
+result_cache = create_result_cache(args.result_cache)
+
 start_time = time.perf_counter()
-csv_file_path = "reviews.csv"
-processor = CSVProcessor(csv_file_path)
 columns_to_drop = ['business_name', 'author_name', 'photo', 'rating_category']
-processor.drop_columns(columns_to_drop)
-# Assuming the save_to_csv method exists and saves the processed file
-processor.save_to_csv("processed_reviews.csv")
-# -----------------------------------------------------------------------------------------
-# Step 2: Read the processed file back into a DataFrame
-df = pd.read_csv("processed_reviews.csv")
-
-# Continue with DataFrame manipulations...
-text_analyzer_service_model1 = TextAnalyzerService(model_choice="obi/deid_roberta_i2b2")
-anonymized_texts = []
-for index, row in df.iterrows():
-    text = row[0] # Assuming the first column is the one you want to anonymize
-
-    # Analyze text with the chosen model
-    entities_model1 = text_analyzer_service_model1.analyze_text(text)
-
-    # Anonymize text
-    anonymized_text, req_dict = text_analyzer_service_model1.anonymize_text(text, entities_model1, operator="encrypt")
-    anonymized_texts.append(anonymized_text.text)
-
-df['Anonymized_Text'] = anonymized_texts 
-
-# Save the updated DataFrame to a new CSV file
-df.to_csv("output_anonymized.csv", index=False)
-# ---------------------------------------------------------------------------------------------
-df = pd.read_csv("output_anonymized.csv")
-
-# Initialize the profanity masker
-masker = profanity_masker()
-
-# Define a function to apply the profanity masking to each entry in a given column
-def mask_profanity(text):
-    return masker.mask_words(text)
-
-# Apply the profanity masking to the specified column
-df['Masked_Text'] = df['Anonymized_Text'].apply(mask_profanity)  
-
-# Save the DataFrame to a new CSV file
-df.to_csv("output_masked.csv", index=False)
-# ----------------------------------------------------------------------------------------------
-
-df = pd.read_csv("output_masked.csv")
-
-# Initialize the text classifier
-checkpoint = "distilbert-base-uncased-finetuned-sst-2-english"
-classifier = TextClassifier(checkpoint)
-
-# Define a function to apply the text classification to each entry in a given column
-def classify_text(text):
-        return classifier.infer(text)
-
-# Define the column number to apply the classification
-column_number = 3  # Change this to the column number where the text is located (0-based index)
-
-# Apply the text classification to the specified column
-
-df['Classification_Result'] = df.iloc[:, column_number].apply(classify_text)
+pipeline = Pipeline.default(
+    columns_to_drop=columns_to_drop,
+    materialize=materialize,
+    output_dir=args.output_dir,
+    materialize_format=args.materialize_format,
+    pii_processes=args.pii_processes,
+    result_cache=result_cache,
+    max_tokens=args.max_tokens,
+    classifier_precision=args.precision,
+    calibration_data=args.calibration_file if args.precision == "int8" else None,
+    classifier_throughput=args.throughput,
+    classifier_cascade=args.cascade,
+    token_cache=TokenCache(args.token_cache) if args.token_cache else None,
+    long_reviews=args.long_reviews,
+)
+if args.stream:
+    # Results are appended to the output file chunk by chunk
+    rows = pipeline.run_streaming(args.input, args.output, chunksize=args.chunksize)
+else:
+    df = pipeline.run(args.input)
+    rows = len(df)
 end_time = time.perf_counter()
 total_time = end_time - start_time
 
-# Print the total time taken for classification
-print("Total Time: ", "%.2f" % total_time, " seconds")
+# Print the time taken per stage and in total
+for stage, seconds in pipeline.timings.items():
+    print(f"{stage}: {seconds:.2f} seconds")
+print("Total Time: ", "%.2f" % total_time, " seconds", f"({rows} reviews)")
+# Share of the transformer batches that was padding, against fixed-size batches in input order
+for stage in pipeline.stages:
+    model = getattr(stage, "analyzer", None) or getattr(stage, "classifier", None)
+    stats = model.scheduler.stats() if getattr(model, "scheduler", None) else None
+    if stats and stats["sequences"]:
+        print(f"{stage.name} padding waste: {stats['padding_waste']:.1%} (fixed-size: {stats['naive_padding_waste']:.1%})")
+for stage in pipeline.stages:
+    stats = stage.classifier.cascade_stats() if hasattr(stage, "classifier") else None
+    if stats and stats["reviews"]:
+        print(f"{stage.name} cascade: {stats['escalation_rate']:.1%} of reviews escalated to the transformer")
+for stage in pipeline.stages:
+    token_cache = getattr(getattr(stage, "classifier", None), "token_cache", None)
+    if token_cache is not None:
+        print(f"{stage.name} token cache: hit rate {token_cache.stats()['hit_rate']}")
+if result_cache is not None:
+    for stage, stats in result_cache.stats()["namespaces"].items():
+        print(f"Result cache {stage}: hit rate {stats['hit_rate']}")
 
 # Save the DataFrame to a new CSV file
-df.to_csv("output_classified.csv", index=False)
\ No newline at end of file
+if not args.stream:
+    df.to_csv(args.output, index=False)
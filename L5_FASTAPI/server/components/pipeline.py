@@ -0,0 +1,299 @@
+import importlib.util
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from .googlereviews import CSVProcessor
+    from .batching import TokenBudgetScheduler
+except ImportError:
+    # If relative import fails, try absolute import
+    from googlereviews import CSVProcessor
+    from batching import TokenBudgetScheduler
+
+
+class Stage:
+    """
+    One step of the review pipeline.
+
+    A stage receives the DataFrame produced by the previous stage and returns it with
+    its own output column added. Subclasses set `name` and `artifact` (the file name
+    used when the stage output is materialized) and implement `run`.
+    """
+
+    name = "stage"
+    artifact = "output"
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        raise NotImplementedError
+
+    @staticmethod
+    def column(df, column):
+        """Select a column by name or by 0-based position"""
+        return df.iloc[:, column] if isinstance(column, int) else df[column]
+
+
+class CSVProcessorStage(Stage):
+    """Load the reviews file (or take a DataFrame) and drop unused columns."""
+
+    name = "process_csv"
+    artifact = "processed_reviews"
+
+    def __init__(self, columns_to_drop=None):
+        self.columns_to_drop = columns_to_drop or []
+
+    def run(self, source):
+        if isinstance(source, pd.DataFrame):
+            return source.drop(columns=self.columns_to_drop)
+        processor = CSVProcessor(source)
+        if self.columns_to_drop:
+            processor.drop_columns(self.columns_to_drop)
+        return processor.df
+
+
+class AnonymizeStage(Stage):
+    """Replace PII with Presidio through TextAnalyzerService."""
+
+    name = "anonymise"
+    artifact = "output_anonymized"
+
+    def __init__(self, analyzer=None, input_column=0, output_column="Anonymized_Text", operator="encrypt",
+                 processes=None, result_cache=None, scheduler=None):
+        """
+        :param processes: When greater than 1, shard the entity analysis across this many
+                          worker processes. Placeholder numbering matches the sequential run.
+        :param result_cache: ResultCache for the analyzer created when none is given.
+        :param scheduler: TokenBudgetScheduler for the analyzer created when none is given.
+        """
+        if analyzer is None:
+            try:
+                from .PII.pii import TextAnalyzerService
+            except ImportError:
+                from PII.pii import TextAnalyzerService
+            analyzer = TextAnalyzerService(
+                model_choice="obi/deid_roberta_i2b2", result_cache=result_cache, scheduler=scheduler
+            )
+        self.analyzer = analyzer
+        self.input_column = input_column
+        self.output_column = output_column
+        self.operator = operator
+        self.processes = processes
+
+    def run(self, df):
+        texts = self.column(df, self.input_column).tolist()
+        if self.processes and self.processes > 1:
+            df[self.output_column] = self.analyzer.anonymize_texts_parallel(
+                texts, processes=self.processes, operator=self.operator
+            )
+        else:
+            df[self.output_column] = self.analyzer.anonymize_texts(texts, operator=self.operator)
+        return df
+
+
+class ProfanityMaskStage(Stage):
+    """Mask profanity with the compiled word-list matcher."""
+
+    name = "mask_profanity"
+    artifact = "output_masked"
+
+    def __init__(self, masker=None, input_column="Anonymized_Text", output_column="Masked_Text", result_cache=None):
+        if masker is None:
+            try:
+                from .profanity_masker.main import profanity_masker
+            except ImportError:
+                from profanity_masker.main import profanity_masker
+            masker = profanity_masker(result_cache=result_cache)
+        self.masker = masker
+        self.input_column = input_column
+        self.output_column = output_column
+
+    def run(self, df):
+        df[self.output_column] = self.masker.mask_batch(self.column(df, self.input_column).tolist())
+        return df
+
+
+class ClassifyStage(Stage):
+    """Classify sentiment in batches with TextClassifier."""
+
+    name = "classify"
+    artifact = "output_classified"
+
+    def __init__(self, classifier=None, input_column="Masked_Text", output_column="Classification_Result",
+                 result_cache=None, scheduler=None, precision="fp32", calibration_data=None, throughput=False,
+                 cascade=False, token_cache=None, long_reviews="truncate"):
+        if classifier is None:
+            try:
+                from .sentiment_classifier.main import TextClassifier
+            except ImportError:
+                from sentiment_classifier.main import TextClassifier
+            classifier = TextClassifier(
+                "distilbert-base-uncased-finetuned-sst-2-english",
+                result_cache=result_cache,
+                scheduler=scheduler,
+                precision=precision,
+                calibration_data=calibration_data,
+                throughput=throughput,
+                cascade=cascade,
+                token_cache=token_cache,
+                long_reviews=long_reviews,
+            )
+        self.classifier = classifier
+        self.input_column = input_column
+        self.output_column = output_column
+
+    def run(self, df):
+        scores = self.classifier.infer_scores(self.column(df, self.input_column))
+        # The label goes to output_column, next to its positive probability and logits
+        scores.columns = [self.output_column, *scores.columns[1:]]
+        scores.index = df.index
+        df[list(scores.columns)] = scores
+        return df
+
+
+class Pipeline:
+    """
+    Runs stages in order, passing one DataFrame along in memory.
+
+    Nothing is written between stages unless `materialize` asks for it, in which case
+    the selected stage outputs are saved to `output_dir` in `materialize_format`
+    (csv by default and in streaming mode; parquet and feather need pyarrow).
+    """
+
+    writers = {
+        "parquet": lambda df, path: df.to_parquet(path, index=False),
+        "feather": lambda df, path: df.reset_index(drop=True).to_feather(path),
+        "csv": lambda df, path: df.to_csv(path, index=False),
+    }
+
+    def __init__(self, stages, materialize=None, output_dir=".", materialize_format="csv"):
+        """
+        :param stages: Stage instances in execution order.
+        :param materialize: True for every stage, or an iterable of stage names to save.
+        :param output_dir: Directory for materialized stage outputs.
+        :param materialize_format: One of "parquet", "feather" or "csv".
+        """
+        if materialize_format not in self.writers:
+            raise ValueError(f"Unknown materialize format {materialize_format!r}")
+        if materialize and materialize_format != "csv" and importlib.util.find_spec("pyarrow") is None:
+            # Fail before any stage runs rather than after the first one
+            raise ValueError(f"Materializing as {materialize_format} needs pyarrow; install it or use csv")
+        self.stages = list(stages)
+        if materialize is True:
+            materialize = [stage.name for stage in self.stages]
+        self.materialize = set(materialize or [])
+        self.output_dir = Path(output_dir)
+        self.materialize_format = materialize_format
+        self.timings = {}
+        self.columns = {}
+
+    @classmethod
+    def default(cls, columns_to_drop=None, analyzer=None, masker=None, classifier=None, pii_processes=None,
+                result_cache=None, max_tokens=None, classifier_precision="fp32", calibration_data=None,
+                classifier_throughput=False, classifier_cascade=False, token_cache=None,
+                long_reviews="truncate", **kwargs):
+        """
+        The standard CSVProcessor → PII → profanity → classifier pipeline
+
+        :param result_cache: ResultCache shared by the stage models created here, so
+                             duplicate or previously seen reviews skip every stage.
+        :param max_tokens: Token budget per transformer batch for the models created here;
+                           reviews are grouped by length instead of cut into fixed-size batches.
+        :param classifier_precision: "fp32" or "int8" for the classifier created here.
+        :param calibration_data: Reviews (CSV path or texts) to build the INT8 classifier from.
+        :param classifier_throughput: Run the classifier created here on an AsyncInferQueue.
+        :param classifier_cascade: Let the lexicon model answer confident reviews and
+                                   escalate only the uncertain ones to the transformer.
+        :param token_cache: TokenCache for the classifier created here, so repeated runs
+                            over the same reviews skip tokenization.
+        :param long_reviews: "truncate" or "window" (sliding windows with averaged logits)
+                             for reviews longer than the classifier's maximum length.
+        """
+        def scheduler():
+            return TokenBudgetScheduler(max_tokens=max_tokens) if max_tokens else None
+
+        return cls(
+            [
+                CSVProcessorStage(columns_to_drop),
+                AnonymizeStage(analyzer, processes=pii_processes, result_cache=result_cache, scheduler=scheduler()),
+                ProfanityMaskStage(masker, result_cache=result_cache),
+                ClassifyStage(
+                    classifier,
+                    result_cache=result_cache,
+                    scheduler=scheduler(),
+                    precision=classifier_precision,
+                    calibration_data=calibration_data,
+                    throughput=classifier_throughput,
+                    cascade=classifier_cascade,
+                    token_cache=token_cache,
+                    long_reviews=long_reviews,
+                ),
+            ],
+            **kwargs,
+        )
+
+    def run(self, source):
+        """
+        Push a reviews file path or DataFrame through every stage.
+
+        :return: The final DataFrame. `timings` holds seconds per stage and `columns`
+                 the column names present after each stage.
+        """
+        data = source
+        for stage in self.stages:
+            start = time.perf_counter()
+            data = stage.run(data)
+            self.timings[stage.name] = time.perf_counter() - start
+            self.columns[stage.name] = list(data.columns)
+            if stage.name in self.materialize:
+                self.save(data, stage.artifact)
+        return data
+
+    def run_streaming(self, source, output_path, chunksize=10_000):
+        """
+        Push a reviews file through every stage chunksize rows at a time.
+
+        Each chunk is appended to `output_path` (CSV) as soon as it is classified, so
+        memory stays bounded by one chunk regardless of the input size. Materialized
+        stage outputs are appended the same way and must use the csv format.
+
+        :return: The number of rows written.
+        """
+        if self.materialize and self.materialize_format != "csv":
+            raise ValueError("Streaming mode can only materialize stage outputs as csv")
+        first_stage, *stages = self.stages
+        if not isinstance(first_stage, CSVProcessorStage):
+            raise ValueError("Streaming mode expects a CSVProcessorStage as its first stage")
+        self.timings = {stage.name: 0.0 for stage in self.stages}
+        rows = 0
+        chunks = CSVProcessor.iter_chunks(source, chunksize)
+        while True:
+            start = time.perf_counter()
+            data = next(chunks, None)
+            if data is None:
+                break
+            data = first_stage.run(data)
+            self.timings[first_stage.name] += time.perf_counter() - start
+            self._record(first_stage, data, append=rows > 0)
+            for stage in stages:
+                start = time.perf_counter()
+                data = stage.run(data)
+                self.timings[stage.name] += time.perf_counter() - start
+                self._record(stage, data, append=rows > 0)
+            data.to_csv(output_path, mode="a" if rows else "w", header=not rows, index=False)
+            rows += len(data)
+        return rows
+
+    def _record(self, stage, data, append):
+        self.columns[stage.name] = list(data.columns)
+        if stage.name in self.materialize:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            path = self.output_dir / f"{stage.artifact}.csv"
+            data.to_csv(path, mode="a" if append else "w", header=not append, index=False)
+
+    def save(self, df, artifact):
+        """Write one stage output in the configured format and return its path"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{artifact}.{self.materialize_format}"
+        self.writers[self.materialize_format](df, path)
+        return path
@@ -1,10 +1,56 @@
-from better_profanity import profanity
+import hashlib
+
+import pandas as pd
+
+try:
+    from .matcher import ProfanityMatcher
+    from .wordlists import Wordlists
+except ImportError:
+    # If relative import fails, try absolute import
+    from matcher import ProfanityMatcher
+    from wordlists import Wordlists
 
 
 class profanity_masker():
-    def __init__(self) -> None:
-        profanity.load_censor_words()
+    def __init__(self, words=None, wordlists=None, check_interval=1.0, result_cache=None) -> None:
+        """
+        :param words: A fixed list of words to mask instead of word list files.
+        :param wordlists: Mapping of list name to file path, served next to better_profanity's
+                          list ("default"). Files are re-read when they change.
+        :param check_interval: Seconds between checks of the word list files for changes.
+        :param result_cache: Optional ResultCache; texts masked before with the same word
+                             list contents are returned without scanning them again.
+        """
+        # Masks keep better_profanity's fixed "****"
+        self.matcher = ProfanityMatcher(words, mask_length=4) if words is not None else None
+        self.words_hash = hashlib.sha256("\n".join(sorted(words)).encode()).hexdigest() if words is not None else None
+        self.wordlists = None
+        if words is None:
+            self.wordlists = Wordlists(wordlists, check_interval=check_interval, mask_length=4)
+        self.result_cache = result_cache
+
+    def get_matcher(self, wordlist=None):
+        """The compiled matcher for a named word list (the default list when None)"""
+        return self._current(wordlist)[1]
+
+    def _current(self, wordlist=None):
+        if self.matcher is not None:
+            return self.words_hash, self.matcher
+        return self.wordlists.current(wordlist)
+
+    def mask_words(self, text, wordlist=None):
+        if not isinstance(text, str):
+            text = str(text)
+        return self.mask_batch([text], wordlist)[0]
 
-    def mask_words(self, text):
-        censored_text = profanity.censor(text)
-        return censored_text
\ No newline at end of file
+    def mask_batch(self, texts, wordlist=None):
+        """Mask a whole column (Series or list) in one pass"""
+        content_hash, matcher = self._current(wordlist)
+        if self.result_cache is None:
+            return matcher.mask_batch(texts)
+        # The word list contents and mask options decide the output
+        version = f"{content_hash}|{matcher.censor_char}|{matcher.mask_length}"
+        masked = self.result_cache.cached("mask", version, texts, matcher.mask_batch)
+        if isinstance(texts, pd.Series):
+            return pd.Series(masked, index=texts.index, name=texts.name)
+        return masked
\ No newline at end of file
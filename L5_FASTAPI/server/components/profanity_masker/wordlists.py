@@ -0,0 +1,223 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from .matcher import ProfanityMatcher, default_wordlist_path
+except ImportError:
+    # If relative import fails, try absolute import
+    from matcher import ProfanityMatcher, default_wordlist_path
+
+DEFAULT_WORDLIST = "default"
+
+
+class UnknownWordlistError(LookupError):
+    """Raised when a masker is asked for a word list it was not configured with."""
+
+
+def parse_wordlists(spec):
+    """
+    Parse "name=path,name=path" (as used in PROFANITY_WORDLISTS) into a dict.
+
+    :param spec: The specification string; empty or None gives an empty dict.
+    """
+    wordlists = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, sep, path = item.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Invalid word list {item!r}, expected name=path")
+        wordlists[name.strip()] = path.strip()
+    return wordlists
+
+
+class MatcherCache:
+    """
+    Compiled matchers keyed by the sha256 of their word list file.
+
+    Identical lists (the same file registered twice, two tenants sharing a language,
+    a file touched but not changed) are compiled once and share one matcher.
+    Matchers are immutable, so sharing them between threads is safe.
+    """
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self._matchers = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content, **options):
+        """
+        Return the matcher for a word list file's raw bytes, compiling it on first use.
+
+        :param options: ProfanityMatcher options, part of the cache key.
+        """
+        key = (hashlib.sha256(content).hexdigest(), tuple(sorted(options.items())))
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is not None:
+                self._matchers.move_to_end(key)
+                self.hits += 1
+                return key[0], matcher
+            self.misses += 1
+        # Compile outside the lock; a concurrent miss on the same list only wastes work
+        words = [line.strip() for line in content.decode("utf-8").splitlines() if line.strip()]
+        matcher = ProfanityMatcher(words, **options)
+        with self._lock:
+            matcher = self._matchers.setdefault(key, matcher)
+            self._matchers.move_to_end(key)
+            while len(self._matchers) > self.max_size:
+                self._matchers.popitem(last=False)
+        return key[0], matcher
+
+
+# Shared by every masker in the process, so a new masker for a known list compiles nothing
+matcher_cache = MatcherCache()
+
+
+class Wordlist:
+    """
+    One named word list file and its current compiled matcher.
+
+    The file is re-checked at most every `check_interval` seconds. When its mtime or
+    size changed the new contents are compiled (or fetched from the cache) and the
+    matcher is swapped in with a single assignment, so concurrent readers see either
+    the old or the new list, never a partial one. A file that disappears or fails to
+    parse keeps serving its last good matcher.
+    """
+
+    def __init__(self, name, path, check_interval=1.0, cache=None, **options):
+        self.name = name
+        self.path = path
+        self.check_interval = check_interval
+        self.cache = cache or matcher_cache
+        self.options = options
+        self.loaded_at = None
+        self._state = None  # (file signature, content hash, matcher)
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+        self.reload()
+
+    @property
+    def matcher(self):
+        return self.current()[1]
+
+    def current(self):
+        """The content hash and compiled matcher of the current file version, as one pair"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        _, content_hash, matcher = self._state
+        return content_hash, matcher
+
+    @property
+    def content_hash(self):
+        return self._state[1]
+
+    def refresh(self):
+        """Reload the file if it changed since the last check"""
+        if not self._reload_lock.acquire(blocking=False):
+            # Another thread is already reloading; keep serving the current matcher
+            return
+        try:
+            self._checked_at = time.monotonic()
+            try:
+                signature = self._signature()
+            except OSError as e:
+                print(f"⚠️  Word list {self.name} unavailable, keeping the loaded version: {e}")
+                return
+            if signature != self._state[0]:
+                self._load(signature)
+        finally:
+            self._reload_lock.release()
+
+    def reload(self):
+        """Read and compile the file now, regardless of its signature"""
+        with self._reload_lock:
+            self._checked_at = time.monotonic()
+            self._load(self._signature(), strict=self._state is None)
+
+    def _signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, signature, strict=False):
+        try:
+            with open(self.path, "rb") as f:
+                content = f.read()
+            content_hash, matcher = self.cache.get(content, **self.options)
+        except (OSError, UnicodeDecodeError) as e:
+            if strict:
+                raise
+            print(f"⚠️  Could not reload word list {self.name}, keeping the loaded version: {e}")
+            return
+        if self._state is None or content_hash != self._state[1]:
+            self.loaded_at = time.time()
+            if self._state is not None:
+                print(f"🔄 Reloaded word list {self.name} ({matcher.size} words)")
+        self._state = (signature, content_hash, matcher)
+
+    def info(self):
+        _, content_hash, matcher = self._state
+        return {
+            "path": str(self.path),
+            "sha256": content_hash,
+            "words": matcher.size,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class Wordlists:
+    """
+    Named word lists served side by side, e.g. one per tenant or language.
+
+    Nothing here is process-global: each masker holds its own Wordlists, while the
+    compiled matchers come from the shared content-addressed MatcherCache.
+    """
+
+    def __init__(self, paths=None, default=DEFAULT_WORDLIST, check_interval=1.0, cache=None, **options):
+        """
+        :param paths: Mapping of list name to file path. The better_profanity list is
+                      added as `default` unless a path with that name is given.
+        :param default: Name used when no list is requested.
+        :param check_interval: Seconds between checks of a file for changes.
+        :param options: ProfanityMatcher options applied to every list.
+        """
+        self.default = default
+        self.check_interval = check_interval
+        self.cache = cache or matcher_cache
+        self.options = options
+        self._lists = {}
+        paths = dict(paths or {})
+        paths.setdefault(DEFAULT_WORDLIST, default_wordlist_path())
+        for name, path in paths.items():
+            self.add(name, path)
+        if default not in self._lists:
+            raise UnknownWordlistError(f"Default word list {default!r} is not configured")
+
+    def add(self, name, path):
+        """Register (or replace) a named list; it is compiled before it becomes visible"""
+        wordlist = Wordlist(name, path, check_interval=self.check_interval, cache=self.cache, **self.options)
+        self._lists = {**self._lists, name: wordlist}
+        return wordlist
+
+    def matcher(self, name=None):
+        """The current compiled matcher for a list, reloading its file if it changed"""
+        return self.current(name)[1]
+
+    def current(self, name=None):
+        """The content hash and compiled matcher of a list, reloading its file if it changed"""
+        name = name or self.default
+        wordlist = self._lists.get(name)
+        if wordlist is None:
+            raise UnknownWordlistError(f"Unknown word list {name!r}, expected one of {sorted(self._lists)}")
+        return wordlist.current()
+
+    def names(self):
+        return sorted(self._lists)
+
+    def info(self):
+        return {name: wordlist.info() for name, wordlist in self._lists.items()}
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ResultCache:
+    """
+    Content-addressed cache of per-text stage results.
+
+    A result is keyed by sha256(namespace, version, text), where the namespace names
+    the stage ("anonymize", "mask", "classify") and the version identifies everything
+    else that determines the output (model, operator, word list, entity vault...).
+    Changing any of these simply stops old entries from matching.
+
+    Lookups go through an in-memory LRU tier and then, when `path` is given, a SQLite
+    file that persists across restarts and can be shared by several processes.
+    Values must be JSON serializable.
+    """
+
+    def __init__(self, path=None, memory_size=10_000, mmap_size=256 * 1024 * 1024):
+        """
+        :param path: SQLite file for the on-disk tier, or None for memory only.
+        :param memory_size: Entries kept in the in-memory LRU tier.
+        :param mmap_size: Bytes of the SQLite file to memory-map.
+        """
+        self.path = Path(path) if path else None
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Other processes may write the same file; wait for their locks instead of failing
+            self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.commit()
+
+    @staticmethod
+    def key(namespace, version, text):
+        return hashlib.sha256(f"{namespace}\0{version}\0{text}".encode("utf-8", "surrogatepass")).hexdigest()
+
+    def lookup(self, namespace, version, texts):
+        """
+        Find cached results for a batch of texts.
+
+        :return: A dict of text -> cached result for the hits, and the list of distinct
+                 texts still to compute, in first-occurrence order. Non-string texts are
+                 never cached and always reported as missing.
+        """
+        found = {}
+        keys = {}
+        uncacheable = 0
+        for text in dict.fromkeys(texts):
+            if isinstance(text, str):
+                keys[self.key(namespace, version, text)] = text
+            else:
+                uncacheable += 1
+        memory_hits = disk_hits = 0
+        with self._lock:
+            for key, text in list(keys.items()):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+                    del keys[key]
+                    memory_hits += 1
+            if keys and self._conn is not None:
+                for key, value in self._select(list(keys)):
+                    value = json.loads(value)
+                    found[keys.pop(key)] = value
+                    self._remember(key, value)
+                    disk_hits += 1
+            stats = self._stats.setdefault(namespace, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+            stats["memory_hits"] += memory_hits
+            stats["disk_hits"] += disk_hits
+            stats["misses"] += len(keys) + uncacheable
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        return found, missing
+
+    def store(self, namespace, version, results):
+        """
+        Save computed results.
+
+        :param results: A dict of text -> result; non-string texts are skipped.
+        """
+        rows = [
+            (self.key(namespace, version, text), value)
+            for text, value in results.items()
+            if isinstance(text, str)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            for key, value in rows:
+                self._remember(key, value)
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in rows],
+                )
+                self._conn.commit()
+
+    def cached(self, namespace, version, texts, compute):
+        """
+        Return one result per text, computing only the texts that are not cached.
+
+        :param compute: Called with the list of distinct missing texts; returns their
+                        results in the same order.
+        """
+        texts = list(texts)
+        found, missing = self.lookup(namespace, version, texts)
+        if missing:
+            computed = dict(zip(missing, compute(missing)))
+            self.store(namespace, version, computed)
+            found.update(computed)
+        return [found[text] for text in texts]
+
+    def stats(self):
+        """Hit and miss counts per namespace since the cache was created"""
+        with self._lock:
+            namespaces = {}
+            for namespace, counts in self._stats.items():
+                lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+                hits = lookups - counts["misses"]
+                namespaces[namespace] = {**counts, "hit_rate": round(hits / lookups, 4) if lookups else None}
+            return {
+                "memory_entries": len(self._memory),
+                "disk": str(self.path) if self.path else None,
+                "namespaces": namespaces,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _select(self, keys, chunk=500):
+        # Stay well below SQLite's limit on bound parameters
+        for start in range(0, len(keys), chunk):
+            part = keys[start:start + chunk]
+            placeholders = ",".join("?" * len(part))
+            yield from self._conn.execute(f"SELECT key, value FROM results WHERE key IN ({placeholders})", part)
+
+
+def create_result_cache(url=None, **kwargs):
+    """
+    Build a result cache from a URL.
+
+    :param url: "off" (or empty) for no cache, "memory" for the LRU tier only, or
+                "sqlite:///path/to/results.db" for an LRU tier backed by a SQLite file.
+    :param kwargs: Extra options for ResultCache (memory_size, mmap_size).
+    """
+    if not url or url == "off":
+        return None
+    if url == "memory":
+        return ResultCache(**kwargs)
+    if url.startswith("sqlite:///"):
+        return ResultCache(url[len("sqlite:///"):], **kwargs)
+    raise ValueError(f"Unsupported result cache {url!r}, expected 'off', 'memory' or 'sqlite:///<file>'")
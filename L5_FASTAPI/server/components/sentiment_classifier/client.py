@@ -10,16 +10,12 @@ if __name__ == "__main__":
     checkpoint = "distilbert-base-uncased-finetuned-sst-2-english"
     classifier = TextClassifier(checkpoint)
 
-    # Define a function to apply the text classification to each entry in a given column
-    def classify_text(text):
-        return classifier.infer(text)
-
     # Define the column number to apply the classification
     column_number = 3  # Change this to the column number where the text is located (0-based index)
 
-    # Apply the text classification to the specified column
+    # Classify the specified column in batches
     start_time = time.perf_counter()
-    df['Classification_Result'] = df.iloc[:, column_number].apply(classify_text)
+    df['Classification_Result'], _ = classifier.infer_batch(df.iloc[:, column_number])
     end_time = time.perf_counter()
     total_time = end_time - start_time
 
@@ -0,0 +1,137 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Words and clause punctuation; apostrophes stay inside words ("don't", "isn't")
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:'[^\W_]+)*|[.!?;,:\x00]")
+# Joins the rows of a batch; like clause punctuation it ends every negation scope
+ROW_BREAK = "\x00"
+CLAUSE_BREAKS = (".", "!", "?", ";", ",", ":", ROW_BREAK)
+NEGATIONS = (
+    "not", "no", "never", "nothing", "nobody", "none", "neither", "nor", "without", "hardly", "barely",
+    "don't", "doesn't", "didn't", "isn't", "wasn't", "aren't", "weren't", "won't", "wouldn't",
+    "can't", "cannot", "couldn't", "shouldn't", "haven't", "hasn't", "hadn't", "ain't",
+    "dont", "doesnt", "didnt", "isnt", "wasnt", "arent", "werent", "wont", "wouldnt", "cant", "couldnt",
+)
+
+
+class LexiconSentiment:
+    """
+    Scores a whole column of reviews against a weighted lexicon with array operations.
+
+    The column is lowercased and tokenized as one string, tokens are mapped to integer
+    IDs with a single hash lookup, and each review's score is the sum of its token
+    weights (a sparse row sum, computed with np.bincount over the row of every token).
+    Matching is on whole tokens, so "sad" no longer matches inside "crusade".
+
+    A lexicon word within `negation_window` tokens after a negation ("not good",
+    "never disappointed") counts with `negation_scale` times its weight, unless
+    clause punctuation comes in between. A negation that the lexicon also lists
+    (e.g. "never" as a negative word) keeps its own weight, which is never negated.
+    """
+
+    labels = ("NEGATIVE", "NEUTRAL", "POSITIVE")
+
+    def __init__(self, lexicon, negations=NEGATIONS, negation_window=3, negation_scale=-0.75):
+        """
+        :param lexicon: Mapping of word to weight, positive for positive sentiment.
+        :param negations: Words that open a negation scope. They carry no weight of
+                          their own unless the lexicon lists them.
+        :param negation_window: Tokens after a negation that it applies to.
+        :param negation_scale: Factor for negated weights; negative flips the polarity
+                               (the default is slightly weaker, as in VADER).
+        """
+        negations = set(negations)
+        lexicon = {word.lower(): float(weight) for word, weight in lexicon.items()}
+        # ID 0 is the row break and the last ID is every unknown token (get_indexer gives -1)
+        self.vocabulary = pd.Index(list(dict.fromkeys([ROW_BREAK, *CLAUSE_BREAKS[:-1], *negations, *lexicon])))
+        self.weights = np.zeros(len(self.vocabulary) + 1)
+        self.weights[self.vocabulary.get_indexer(list(lexicon))] = list(lexicon.values())
+        self.is_break = np.zeros(len(self.vocabulary) + 1, dtype=bool)
+        self.is_break[self.vocabulary.get_indexer(list(CLAUSE_BREAKS))] = True
+        self.is_negation = np.zeros(len(self.vocabulary) + 1, dtype=bool)
+        self.is_negation[self.vocabulary.get_indexer(list(negations))] = True
+        self.negation_window = negation_window
+        self.negation_scale = negation_scale
+
+    @classmethod
+    def from_words(cls, positive, negative, **kwargs):
+        """Lexicon with weight +1 for every positive word and -1 for every negative one"""
+        lexicon = {word: 1.0 for word in positive}
+        lexicon.update({word: -1.0 for word in negative})
+        return cls(lexicon, **kwargs)
+
+    def scores(self, texts):
+        """
+        Lexicon score of every text.
+
+        :return: A float array aligned with texts; non-string cells score 0.
+        """
+        positive, negative = self.evidence(texts)
+        return positive - negative
+
+    def evidence(self, texts):
+        """
+        Positive and negative weight found in every text, after negation.
+
+        Their difference is the score; when both are large the review is mixed
+        rather than neutral.
+
+        :return: Two non-negative float arrays aligned with texts.
+        """
+        values = list(texts)
+        rows = np.array([index for index, text in enumerate(values) if isinstance(text, str)], dtype=np.int64)
+        positive = np.zeros(len(values))
+        negative = np.zeros(len(values))
+        if not len(rows):
+            return positive, negative
+        strings = [values[index] for index in rows]
+        if any(ROW_BREAK in text for text in strings):
+            strings = [text.replace(ROW_BREAK, " ") for text in strings]
+        tokens = TOKEN_PATTERN.findall(ROW_BREAK.join(strings).lower().replace("’", "'"))
+        ids = self.vocabulary.get_indexer(tokens)
+        row_of_token = np.cumsum(ids == 0)
+        weights = self.weights[ids]
+        if self.negation_window:
+            weights = self._negate(ids, weights)
+        positive[rows] = np.bincount(row_of_token, weights=np.maximum(weights, 0), minlength=len(rows))
+        negative[rows] = np.bincount(row_of_token, weights=np.maximum(-weights, 0), minlength=len(rows))
+        return positive, negative
+
+    def _negate(self, ids, weights):
+        positions = np.arange(len(ids))
+        # Position of the latest negation and of the latest clause break at every token
+        last_negation = np.maximum.accumulate(np.where(self.is_negation[ids], positions, -1))
+        last_break = np.maximum.accumulate(np.where(self.is_break[ids], positions, -1))
+        negated = (last_negation > last_break) & (positions - last_negation <= self.negation_window)
+        # A negation's own lexicon weight is not negated, by itself or an earlier negation
+        negated &= ~self.is_negation[ids]
+        return np.where(negated & (weights != 0), weights * self.negation_scale, weights)
+
+    def predict_batch(self, texts, missing_label="NEUTRAL"):
+        """
+        Label every text and give a confidence between 0.5 and 1.
+
+        :param missing_label: Label for non-string and empty cells.
+        :return: Labels (a pandas Series aligned with the input if a Series was given,
+                 otherwise a list) and a confidence array.
+        """
+        values = texts.tolist() if isinstance(texts, pd.Series) else list(texts)
+        scores = self.scores(values)
+        labels = np.array(self.labels, dtype=object)[np.sign(scores).astype(np.int64) + 1]
+        # Rounded so a score of 1 gives exactly 0.8 (0.7 + 0.1 is 0.7999999999999999),
+        # which thresholds such as cascade_min_confidence compare against
+        confidences = np.where(scores == 0, 0.5, np.round(0.7 + np.minimum(3, np.abs(scores)) / 10, 6))
+        missing = np.array([not (isinstance(text, str) and text) for text in values], dtype=bool)
+        if missing.any():
+            labels[missing] = missing_label
+            confidences[missing] = 0.5
+        if isinstance(texts, pd.Series):
+            return pd.Series(labels, index=texts.index, name=texts.name), confidences
+        return labels.tolist(), confidences
+
+    def predict(self, text):
+        """Label and confidence of a single text"""
+        labels, confidences = self.predict_batch([text])
+        return labels[0], float(confidences[0])
@@ -1,18 +1,87 @@
 import warnings
 from pathlib import Path
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
 import time
 import numpy as np
 
-# Try to import heavy ML dependencies, fall back to simple classifier if not available
 try:
-    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    from .lexicon import LexiconSentiment
+except ImportError:
+    # If relative import fails, try absolute import
+    from lexicon import LexiconSentiment
+
+# Try to import heavy ML dependencies, fall back to simple classifier if not available.
+# torch and transformers are only needed to convert a checkpoint and are imported lazily,
+# so a cached OpenVINO IR can be served with openvino and the Rust tokenizer alone.
+try:
     import openvino as ov
-    import torch
+    try:
+        from .tokenizer import FastTokenizer
+    except ImportError:
+        # If relative import fails, try absolute import
+        from tokenizer import FastTokenizer
     HEAVY_DEPS_AVAILABLE = True
 except ImportError:
     HEAVY_DEPS_AVAILABLE = False
     print("⚠️  Heavy ML dependencies not available, using lightweight sentiment classifier")
 
+def rss_mb():
+    """Resident set size of this process in MiB, or None where /proc is not available"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def ir_cache_dir(checkpoint, model_dir="my_models/", max_seq_length=128):
+    """Directory of the cached IR, keyed by checkpoint, max_seq_length and OpenVINO version"""
+    key = f"{checkpoint}|{max_seq_length}|{ov.get_version()}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return Path(model_dir) / f"{checkpoint}-{digest}"
+
+
+def convert_checkpoint(checkpoint, ir_dir, max_seq_length=128):
+    """Convert a Hugging Face checkpoint to an OpenVINO IR and save it with its tokenizer"""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    import torch
+
+    ir_dir = Path(ir_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(checkpoint)
+    tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+    # Both the batch and the sequence dimension are dynamic so the same compiled
+    # model serves single reviews and padded batches
+    input_info = [(ov.PartialShape([-1, -1]), ov.Type.i64), (ov.PartialShape([-1, -1]), ov.Type.i64)]
+    default_input = torch.ones(1, max_seq_length, dtype=torch.int64)
+    inputs = {
+        "input_ids": default_input,
+        "attention_mask": default_input,
+    }
+    ov_model = ov.convert_model(model, input=input_info, example_input=inputs)
+
+    # Write into a private directory first so concurrent workers never read a partial IR
+    tmp_dir = ir_dir.with_name(f"{ir_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    ov.save_model(ov_model, tmp_dir / "model.xml")
+    tokenizer.save_pretrained(tmp_dir)
+    try:
+        tmp_dir.rename(ir_dir)
+    except OSError:
+        # Another process finished the same conversion first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
 class SimpleSentimentClassifier:
     """Lightweight rule-based sentiment classifier as fallback"""
     
@@ -27,33 +96,124 @@ class SimpleSentimentClassifier:
             'disappointed', 'frustrated', 'annoying', 'worst', 'poor', 'disgusting',
             'pathetic', 'useless', 'boring', 'mediocre', 'appalling', 'dreadful'
         }
+        # Whole-word matching with negation handling, scored a whole batch at a time
+        self.engine = LexiconSentiment.from_words(self.positive_words, self.negative_words)
     
     def predict(self, text):
         """Simple sentiment prediction based on word matching"""
-        text_lower = text.lower()
-        words = text_lower.split()
-        
-        positive_score = sum(1 for word in words if word in self.positive_words)
-        negative_score = sum(1 for word in words if word in self.negative_words)
-        
-        if positive_score > negative_score:
-            return "POSITIVE", 0.7 + min(0.3, positive_score * 0.1)
-        elif negative_score > positive_score:
-            return "NEGATIVE", 0.7 + min(0.3, negative_score * 0.1)
-        else:
-            return "NEUTRAL", 0.5
+        return self.engine.predict(text)
+
+    def predict_batch(self, texts):
+        """Labels and confidences for a list of texts in one vectorized pass"""
+        return self.engine.predict_batch(texts)
+
+    def evidence(self, texts):
+        """Positive and negative word weight of every text"""
+        return self.engine.evidence(texts)
+
+# Columns infer_scores returns: the label plus what dashboards need to show its confidence
+SCORE_COLUMNS = ("Classification_Result", "Positive_Probability", "Negative_Logit", "Positive_Logit")
+
 
 class TextClassifier:
-    def __init__(self, checkpoint=None, model_dir="my_models/", max_seq_length=128):
+    labels = {0: "NEGATIVE", 1: "POSITIVE"}
+    precisions = ("fp32", "int8")
+    long_review_modes = ("truncate", "window")
+    # Lexicon answers never claim more than this probability, so their logits stay in the
+    # range of a fairly sure transformer instead of saturating at log(1e-6)
+    lexicon_max_probability = 0.9
+
+    def __init__(self, checkpoint=None, model_dir="my_models/", max_seq_length=128, batch_size=32, result_cache=None,
+                 scheduler=None, precision="fp32", calibration_data=None, calibration_size=300, eval_size=200,
+                 throughput=False, inference_only=False, cascade=False, cascade_min_confidence=0.8,
+                 cascade_min_polarity=0.5, cascade_audit=0.0, token_cache=None, long_reviews="truncate",
+                 window_overlap=128, max_windows=4, requantize=False, infer_timeout=60.0):
+        """
+        :param precision: "fp32" serves the converted IR; "int8" serves an NNCF post-training
+                          quantized copy, cached next to it and built on first use.
+        :param calibration_data: Reviews for INT8 calibration and the agreement check, as a
+                                 CSV path (first column) or a list of texts. Only needed to
+                                 build the INT8 IR.
+        :param calibration_size: Reviews used to calibrate the quantization.
+        :param eval_size: Held-out reviews on which INT8 predictions are compared with FP32.
+                          INT8 is only served when there was at least one.
+        :param requantize: Rebuild a cached INT8 IR that was calibrated on other data. By
+                           default the cached IR (shared by every process using model_dir)
+                           is kept and only a warning is printed.
+        :param throughput: Compile with PERFORMANCE_HINT=THROUGHPUT and run batches on an
+                           AsyncInferQueue sized to the device's optimal number of requests,
+                           so several batches are in flight across the cores at once.
+        :param infer_timeout: Seconds to wait for the batches of one call in throughput
+                              mode before raising TimeoutError.
+        :param inference_only: Serve a prebuilt IR only and fail instead of converting the
+                               checkpoint when it is missing (build it ahead of time with
+                               `python sentiment_classifier/main.py --checkpoint ...`).
+        :param cascade: Score every review with the lexicon model first and send only the
+                        uncertain ones to the transformer.
+        :param cascade_min_confidence: Lexicon confidence below which a review is escalated.
+                                       A review with net lexicon score s has confidence
+                                       0.7 + min(3, |s|) / 10, so 0.8 keeps reviews with
+                                       |s| >= 1. Reviews without any lexicon word always
+                                       escalate, and so does every review when this is
+                                       above lexicon_max_probability (0.9).
+        :param cascade_min_polarity: Escalate mixed reviews, where |positive - negative|
+                                     is below this fraction of the lexicon words' total weight.
+        :param cascade_audit: Fraction of the confident reviews also run through the
+                              transformer, only to measure how often the lexicon agrees.
+        :param token_cache: Optional TokenCache; reviews tokenized before (in this or an
+                            earlier run) are read from its memory-mapped arrays instead.
+        :param long_reviews: "truncate" cuts reviews at the model's maximum length; "window"
+                             classifies overlapping windows of long reviews (batched with
+                             every other sequence) and averages their logits per review.
+        :param window_overlap: Tokens shared by consecutive windows.
+        :param max_windows: Upper bound on windows per review. Longer reviews get this many
+                            windows spread evenly over the text, overlapping less or
+                            leaving gaps, so one review cannot dominate a batch.
+        """
+        if precision not in self.precisions:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {self.precisions}")
+        if long_reviews not in self.long_review_modes:
+            raise ValueError(f"Unknown long_reviews {long_reviews!r}, expected one of {self.long_review_modes}")
         self.checkpoint = checkpoint
         self.model_dir = model_dir
         self.max_seq_length = max_seq_length
+        self.batch_size = batch_size
+        self.precision = precision
+        self.calibration_data = calibration_data
+        self.calibration_size = calibration_size
+        self.eval_size = eval_size
+        self.requantize = requantize
+        self.quantization_report = None
+        self.throughput = throughput
+        self.infer_timeout = infer_timeout
+        self.inference_only = inference_only
+        self.converted = False
+        self.cascade = cascade
+        self.cascade_min_confidence = cascade_min_confidence
+        self.cascade_min_polarity = cascade_min_polarity
+        self.cascade_audit = cascade_audit
+        self._cascade_lock = threading.Lock()
+        self._cascade_stats = {"reviews": 0, "escalated": 0, "escalated_agreed": 0, "audited": 0, "audit_agreed": 0}
+        self._audit_rng = np.random.default_rng(0)
+        # Optional ResultCache: reviews classified before by the same model skip inference
+        self.result_cache = result_cache
+        # Optional TokenBudgetScheduler: batches reviews of similar token length under a
+        # token budget instead of cutting the input into fixed-size batches
+        self.scheduler = scheduler
+        self.token_cache = token_cache
+        self.long_reviews = long_reviews
+        self.window_overlap = window_overlap
+        self.max_windows = max_windows
         
+        rss_before = rss_mb()
         if HEAVY_DEPS_AVAILABLE and checkpoint:
             try:
                 self._init_heavy_model()
                 self.use_heavy_model = True
                 print(f"✅ Loaded heavy ML model: {checkpoint}")
+                if cascade:
+                    # The lexicon model answers the obvious reviews in front of the transformer
+                    self._init_simple_model()
             except Exception as e:
                 print(f"⚠️  Failed to load heavy model: {e}")
                 self._init_simple_model()
@@ -61,38 +221,183 @@ class TextClassifier:
         else:
             self._init_simple_model()
             self.use_heavy_model = False
+        # The serving process holds the tokenizer and the compiled IR only; torch is
+        # loaded (in a separate process) just for a conversion
+        self.memory_report = {
+            "rss_before_mb": rss_before,
+            "rss_after_mb": rss_mb(),
+            "converted": self.converted,
+            "torch_loaded": "torch" in sys.modules,
+        }
+        print(f"📏 Classifier RSS {self.memory_report['rss_before_mb']} -> {self.memory_report['rss_after_mb']} MiB")
     
     def _init_heavy_model(self):
-        """Initialize the heavy ML-based model"""
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.checkpoint)
-        self.tokenizer = AutoTokenizer.from_pretrained(self.checkpoint)
-        self.ir_xml_name = self.checkpoint + ".xml"
-        self.ir_xml_path = Path(self.model_dir) / self.ir_xml_name
-        self.input_info = [(ov.PartialShape([1, -1]), ov.Type.i64), (ov.PartialShape([1, -1]), ov.Type.i64)]
-        self.default_input = torch.ones(1, self.max_seq_length, dtype=torch.int64)
-        self.inputs = {
-            "input_ids": self.default_input,
-            "attention_mask": self.default_input,
-        }
-        self.ov_model = ov.convert_model(self.model, input=self.input_info, example_input=self.inputs)
-        ov.save_model(self.ov_model, self.ir_xml_path)
+        """Initialize the heavy ML-based model, converting the checkpoint only on a cache miss"""
+        self.ir_dir = self._ir_cache_dir()
+        self.ir_xml_path = self.ir_dir / "model.xml"
+        if not self.ir_xml_path.exists():
+            if self.inference_only:
+                raise FileNotFoundError(f"No converted IR at {self.ir_xml_path} and inference_only is set")
+            self._convert_model()
+            self.converted = True
+        self.tokenizer = FastTokenizer.from_pretrained(self.ir_dir)
         self.core = ov.Core()
+        # Let OpenVINO reuse compiled blobs across processes and restarts
+        self.core.set_property({"CACHE_DIR": str(Path(self.model_dir) / "ov_cache")})
         self.device = 'AUTO'
-        self.compiled_model = self.core.compile_model(self.ov_model, self.device)
-        self.infer_request = self.compiled_model.create_infer_request()
-    
+        self.model_path = self.ir_xml_path
+        if self.precision == "int8":
+            try:
+                self.model_path = self._int8_ir_path()
+            except Exception as e:
+                print(f"⚠️  INT8 model unavailable, serving FP32: {e}")
+                self.precision = "fp32"
+        config = {"PERFORMANCE_HINT": "THROUGHPUT"} if self.throughput else {}
+        self.compiled_model = self.core.compile_model(self.core.read_model(self.model_path), self.device, config)
+        self._local = threading.local()
+        if self.throughput:
+            requests = self.compiled_model.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS")
+            self.infer_queue = ov.AsyncInferQueue(self.compiled_model, requests)
+            self.infer_queue.set_callback(self._on_infer_done)
+            # start_async waits for an idle request; callers from several threads take turns
+            self._queue_lock = threading.Lock()
+            print(f"✅ Throughput mode with {requests} parallel infer requests")
+
+    def _int8_ir_path(self):
+        """Path of the cached INT8 IR, quantizing the FP32 IR when it is missing (or stale and requantize is set)"""
+        int8_dir = self.ir_dir / "int8"
+        int8_xml_path = int8_dir / "model.xml"
+        report_path = int8_dir / "report.json"
+        texts = self._calibration_texts()
+        digest = hashlib.sha256("\n".join(texts).encode()).hexdigest() if texts else None
+        if int8_xml_path.exists() and report_path.exists():
+            report = json.loads(report_path.read_text())
+            stale = digest is not None and report.get("calibration_sha256") != digest
+            if not (stale and self.requantize):
+                if stale:
+                    print("⚠️  Cached INT8 model was calibrated on other reviews; keeping it (set requantize to rebuild)")
+                if report.get("agreement") is None:
+                    raise RuntimeError("cached INT8 IR was never checked against FP32 on held-out reviews")
+                self.quantization_report = report
+                return int8_xml_path
+        if not texts:
+            raise RuntimeError("no cached INT8 IR and no calibration_data to build one")
+        self._quantize(int8_dir, texts, digest)
+        return int8_xml_path
+
+    def _calibration_texts(self):
+        """Distinct non-empty reviews from calibration_data, in a fixed shuffled order"""
+        data = self.calibration_data
+        if data is None:
+            return None
+        if isinstance(data, (str, Path)):
+            import pandas as pd
+
+            data = pd.read_csv(data).iloc[:, 0].tolist()
+        texts = list(dict.fromkeys(str(text) for text in data if isinstance(text, str) and text.strip()))
+        order = np.random.default_rng(0).permutation(len(texts))
+        return [texts[index] for index in order[:self.calibration_size + self.eval_size]]
+
+    def _quantize(self, int8_dir, texts, digest):
+        """Quantize the FP32 IR with NNCF and save it with an FP32 agreement report"""
+        import nncf
+
+        calibration, held_out = texts[:self.calibration_size], texts[self.calibration_size:]
+        if not held_out:
+            raise RuntimeError(
+                f"calibration_data has {len(texts)} distinct reviews, none left after {len(calibration)} "
+                "for calibration to check INT8 against FP32"
+            )
+        print(f"⏳ Quantizing {self.checkpoint} to INT8 on {len(calibration)} reviews...")
+        fp32_model = self.core.read_model(self.ir_xml_path)
+        dataset = nncf.Dataset(calibration, lambda text: self.tokenizer([text], truncation=True, padding=True))
+        int8_model = nncf.quantize(
+            fp32_model, dataset, model_type=nncf.ModelType.TRANSFORMER, subset_size=len(calibration)
+        )
+
+        # Check the quantized model against FP32 on reviews it was not calibrated on
+        fp32_labels, fp32_seconds = self._predict(self.core.compile_model(fp32_model, self.device), held_out)
+        int8_labels, int8_seconds = self._predict(self.core.compile_model(int8_model, self.device), held_out)
+        report = {
+            "precision": "int8",
+            "nncf_version": nncf.__version__,
+            "calibration_size": len(calibration),
+            "calibration_sha256": digest,
+            "eval_size": len(held_out),
+            "agreement": float(np.mean(fp32_labels == int8_labels)),
+            "fp32_seconds": round(fp32_seconds, 3),
+            "int8_seconds": round(int8_seconds, 3),
+            "speedup": round(fp32_seconds / int8_seconds, 2) if int8_seconds else None,
+        }
+        print(f"✅ INT8 model agrees with FP32 on {report['agreement']} of {len(held_out)} held-out reviews, "
+              f"{report['speedup']}x faster")
+
+        # Same write-then-rename as the FP32 conversion; an existing copy is only
+        # replaced when requantize was asked for
+        tmp_dir = int8_dir.with_name(f"{int8_dir.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        ov.save_model(int8_model, tmp_dir / "model.xml")
+        (tmp_dir / "report.json").write_text(json.dumps(report, indent=2))
+        shutil.rmtree(int8_dir, ignore_errors=True)
+        try:
+            tmp_dir.rename(int8_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.quantization_report = report
+
+    def _predict(self, compiled_model, texts):
+        """Class indices for texts on one compiled model, and the seconds it took"""
+        start = time.perf_counter()
+        indices = []
+        for begin in range(0, len(texts), self.batch_size):
+            encoded = self.tokenizer(texts[begin:begin + self.batch_size], truncation=True, padding=True)
+            logits = next(iter(compiled_model(encoded).values()))
+            indices.extend(np.argmax(logits, axis=-1).tolist())
+        return np.array(indices), time.perf_counter() - start
+
+    def _ir_cache_dir(self):
+        return ir_cache_dir(self.checkpoint, self.model_dir, self.max_seq_length)
+
+    def _convert_model(self):
+        """
+        Convert the checkpoint in a child process.
+
+        Loading the PyTorch weights (and torch itself) in the serving process would keep
+        them resident next to the compiled IR for the life of the worker. The child
+        exits after writing the IR, which returns all of that memory to the system.
+        """
+        print(f"⏳ Converting {self.checkpoint} to OpenVINO IR...")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--checkpoint", self.checkpoint,
+             "--model-dir", str(self.model_dir), "--max-seq-length", str(self.max_seq_length)],
+            check=True,
+        )
+
+    @property
+    def infer_request(self):
+        """Per-thread infer request so the classifier can be shared by a thread pool"""
+        request = getattr(self._local, "infer_request", None)
+        if request is None:
+            request = self.compiled_model.create_infer_request()
+            self._local.infer_request = request
+        return request
+
     def _init_simple_model(self):
         """Initialize the simple rule-based model"""
         self.simple_classifier = SimpleSentimentClassifier()
         print("✅ Using lightweight rule-based sentiment classifier")
 
     def softmax(self, x):
-        e_x = np.exp(x - np.max(x))
-        res = e_x / e_x.sum()
+        e_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        res = e_x / e_x.sum(axis=-1, keepdims=True)
         return res
 
     def infer(self, input_text):
         """Main inference method that chooses between heavy and simple models"""
+        if self.result_cache is not None or self.cascade or self.long_reviews == "window":
+            labels, _ = self.infer_batch([input_text])
+            return labels[0]
         if self.use_heavy_model:
             return self._infer_heavy(input_text)
         else:
@@ -106,13 +411,413 @@ class TextClassifier:
             return_tensors="np",
         )
         inputs = dict(input_text)
-        label = {0: "NEGATIVE", 1: "POSITIVE"}
         result = self.infer_request.infer(inputs=inputs)
-        for i in result.values():
-            probability = np.argmax(self.softmax(i))
-        return label[probability]
+        logits = next(iter(result.values()))
+        return self.labels[int(np.argmax(logits[0]))]
+
+    def infer_batch(self, texts, batch_size=None):
+        """
+        Classify a sequence of texts in batches.
+
+        :param texts: Iterable of review texts.
+        :param batch_size: Number of texts per inference call. Defaults to self.batch_size.
+        :return: A tuple of (labels, probabilities) where labels is a list of strings and
+                 probabilities is an array of shape (len(texts), 2) with NEGATIVE/POSITIVE scores.
+        """
+        labels, logits = self.infer_logits(texts, batch_size)
+        return labels, self.softmax(logits)
+
+    def infer_scores(self, texts, batch_size=None):
+        """
+        Classify texts and return the result as columns.
+
+        :return: A DataFrame with one row per text and the SCORE_COLUMNS: the label, the
+                 POSITIVE probability and the two raw logits. The lexicon model reports
+                 log-probabilities as its logits.
+        """
+        return self.score_frame(*self.infer_logits(texts, batch_size))
+
+    def score_frame(self, labels, logits):
+        """SCORE_COLUMNS for labels and logits from infer_logits, with one batched softmax"""
+        import pandas as pd
+
+        logits = np.asarray(logits, dtype=np.float32).reshape(-1, 2)
+        return pd.DataFrame({
+            SCORE_COLUMNS[0]: list(labels),
+            SCORE_COLUMNS[1]: self.softmax(logits)[:, 1],
+            SCORE_COLUMNS[2]: logits[:, 0],
+            SCORE_COLUMNS[3]: logits[:, 1],
+        })
+
+    def infer_logits(self, texts, batch_size=None):
+        """
+        Classify a sequence of texts in batches, keeping the raw model output.
+
+        :return: A tuple of (labels, logits) with logits of shape (len(texts), 2).
+        """
+        texts = [str(text) for text in texts]
+        if not texts:
+            return [], np.empty((0, 2), dtype=np.float32)
+        if self.result_cache is None:
+            return self._infer_batch(texts, batch_size)
+
+        def classify(texts):
+            return self._rows(*self._infer_batch(texts, batch_size))
+
+        return self._unrows(self.result_cache.cached("classify", self.cache_version, texts, classify))
+
+    async def infer_async(self, texts, batch_size=None):
+        """
+        Awaitable infer_batch for FastAPI handlers.
+
+        :return: The same (labels, probabilities) tuple as infer_batch.
+        """
+        labels, logits = await self.infer_logits_async(texts, batch_size)
+        return labels, self.softmax(logits)
+
+    async def infer_logits_async(self, texts, batch_size=None):
+        """
+        Awaitable infer_logits for FastAPI handlers.
+
+        In throughput mode the batches are started on the AsyncInferQueue and the
+        coroutine resumes from its completion callbacks, so no thread waits on inference.
+        Otherwise infer_logits runs on a worker thread.
+        """
+        texts = [str(text) for text in texts]
+        if not (texts and self.use_heavy_model and self.throughput) or self.cascade:
+            return await asyncio.to_thread(self.infer_logits, texts, batch_size)
+        found, missing = {}, list(dict.fromkeys(texts))
+        if self.result_cache is not None:
+            found, missing = await asyncio.to_thread(self.result_cache.lookup, "classify", self.cache_version, texts)
+        if missing:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            # Tokenizing and waiting for idle requests happen off the event loop
+            await asyncio.to_thread(
+                self._start_batches, missing, batch_size,
+                lambda logits: loop.call_soon_threadsafe(self._settle, future, logits, None),
+                lambda error: loop.call_soon_threadsafe(self._settle, future, None, error),
+            )
+            try:
+                logits = await asyncio.wait_for(future, self.infer_timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Classifier batches did not finish within {self.infer_timeout} s") from None
+            computed = dict(zip(missing, self._rows(self._labels(logits), logits)))
+            if self.result_cache is not None:
+                await asyncio.to_thread(self.result_cache.store, "classify", self.cache_version, computed)
+            found.update(computed)
+        return self._unrows([found[text] for text in texts])
+
+    @staticmethod
+    def _settle(future, result, error):
+        """Resolve future from a completion callback, unless it already timed out"""
+        if future.done():
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    @staticmethod
+    def _rows(labels, logits):
+        """(labels, logits) as JSON-friendly [label, negative_logit, positive_logit] rows"""
+        return [[label, *map(float, row)] for label, row in zip(labels, logits)]
+
+    @staticmethod
+    def _unrows(rows):
+        return [row[0] for row in rows], np.array([row[1:] for row in rows], dtype=np.float32)
+
+    def _labels(self, logits):
+        return [self.labels[index] for index in logits.argmax(axis=1)]
+
+    @property
+    def cache_version(self):
+        """Identifies the model behind a result, for result cache keys"""
+        # Cached rows hold logits; the prefix keeps rows that held probabilities from matching
+        if self.use_heavy_model:
+            # The IR directory name hashes the checkpoint, sequence length and OpenVINO version
+            version = f"logits|{self.checkpoint}|{self.ir_dir.name}|{self.precision}"
+            if self.quantization_report:
+                version += f"|{self.quantization_report['calibration_sha256']}"
+            if self.cascade:
+                version += (
+                    f"|cascade:{self.cascade_min_confidence}:{self.cascade_min_polarity}:{self.lexicon_max_probability}"
+                )
+            if self.long_reviews == "window":
+                version += f"|window:{self.window_overlap}:{self.max_windows}"
+            return version
+        return f"logits|lexicon:{self.lexicon_max_probability}"
+
+    def _infer_batch(self, texts, batch_size=None):
+        if not self.use_heavy_model:
+            return self._infer_simple_batch(texts)
+        if self.cascade:
+            return self._infer_cascade(texts, batch_size)
+        return self._infer_transformer(texts, batch_size)
+
+    def _infer_cascade(self, texts, batch_size=None):
+        """Lexicon labels for confident reviews, transformer labels for the rest"""
+        labels, logits = self._infer_simple_batch(texts)
+        escalate = self._escalate(texts, self.softmax(logits))
+        confident = np.flatnonzero(~escalate)
+        audit = confident[:0]
+        if self.cascade_audit:
+            with self._cascade_lock:
+                draws = self._audit_rng.random(len(confident))
+            audit = confident[draws < self.cascade_audit]
+        rows = np.concatenate([np.flatnonzero(escalate), audit])
+        if not len(rows):
+            self._record_cascade(len(texts), [], [], [], [])
+            return labels, logits
+        heavy_labels, heavy_logits = self._infer_transformer([texts[row] for row in rows], batch_size)
+        lexicon_labels = [labels[row] for row in rows]
+        escalated = len(rows) - len(audit)
+        for row, label, row_logits in zip(rows[:escalated], heavy_labels, heavy_logits):
+            labels[row] = label
+            logits[row] = row_logits
+        self._record_cascade(
+            len(texts),
+            lexicon_labels[:escalated], heavy_labels[:escalated],
+            lexicon_labels[escalated:], heavy_labels[escalated:],
+        )
+        return labels, logits
+
+    def _escalate(self, texts, probabilities):
+        """Mask of the reviews the lexicon model is unsure about"""
+        positive, negative = self.simple_classifier.evidence(texts)
+        total = positive + negative
+        confidence = probabilities.max(axis=1)
+        mixed = np.abs(positive - negative) < self.cascade_min_polarity * total
+        # The confidence went through float32 log-probabilities; without the tolerance a
+        # single-word review (exactly 0.8) would fall below the default threshold
+        return (confidence < self.cascade_min_confidence - 1e-6) | mixed | (total == 0)
+
+    def _record_cascade(self, reviews, escalated_lexicon, escalated_heavy, audited_lexicon, audited_heavy):
+        with self._cascade_lock:
+            stats = self._cascade_stats
+            stats["reviews"] += reviews
+            stats["escalated"] += len(escalated_lexicon)
+            stats["escalated_agreed"] += sum(a == b for a, b in zip(escalated_lexicon, escalated_heavy))
+            stats["audited"] += len(audited_lexicon)
+            stats["audit_agreed"] += sum(a == b for a, b in zip(audited_lexicon, audited_heavy))
+
+    def cascade_stats(self):
+        """
+        Escalation rate and lexicon/transformer agreement since creation.
+
+        `escalated_agreement` compares the two models on the escalated reviews, where the
+        lexicon is expected to be weak; `audit_agreement` on sampled confident reviews
+        estimates how often the lexicon's answers that were served match the transformer.
+        """
+        if not (self.cascade and self.use_heavy_model):
+            return None
+        with self._cascade_lock:
+            stats = dict(self._cascade_stats)
+        stats["escalation_rate"] = round(stats["escalated"] / stats["reviews"], 4) if stats["reviews"] else None
+        stats["escalated_agreement"] = (
+            round(stats["escalated_agreed"] / stats["escalated"], 4) if stats["escalated"] else None
+        )
+        stats["audit_agreement"] = round(stats["audit_agreed"] / stats["audited"], 4) if stats["audited"] else None
+        stats["min_confidence"] = self.cascade_min_confidence
+        stats["min_polarity"] = self.cascade_min_polarity
+        return stats
+
+    def _infer_transformer(self, texts, batch_size=None):
+        if self.throughput:
+            finished = threading.Event()
+            result = {}
+
+            def done(logits):
+                result["logits"] = logits
+                finished.set()
+
+            def failed(error):
+                result["error"] = error
+                finished.set()
+
+            self._start_batches(texts, batch_size, done, failed)
+            if not finished.wait(self.infer_timeout):
+                raise TimeoutError(f"Classifier batches did not finish within {self.infer_timeout} s")
+            if "error" in result:
+                raise result["error"]
+            logits = result["logits"]
+        else:
+            ids, batches, owners = self._plan(texts, batch_size)
+            logits = np.empty((len(ids), 2), dtype=np.float32)
+            for batch in batches:
+                logits[batch] = self._infer_heavy_ids([ids[index] for index in batch])
+            logits = self._merge_windows(logits, owners, len(texts))
+        return self._labels(logits), logits
+
+    def _encode(self, texts):
+        """
+        Token ids per text, from the token cache when one is configured.
+
+        Truncated to the model's maximum length, except in window mode where the
+        whole review is kept for _windows to split.
+        """
+        truncation = self.long_reviews == "truncate"
+        if self.token_cache is None:
+            return self.tokenizer.encode(texts, truncation=truncation)
+        # The fingerprint covers the vocabulary and the truncation length
+        return self.token_cache.encode(
+            self.tokenizer.fingerprint if truncation else f"{self.tokenizer.fingerprint}-full",
+            texts,
+            lambda missing: self.tokenizer.encode(missing, truncation=truncation),
+        )
+
+    def _windows(self, ids):
+        """
+        Split token id rows longer than the model's maximum length into overlapping windows.
+
+        Each window keeps the row's first and last special tokens ([CLS] ... [SEP]).
+
+        :return: The window rows, and the index of the row every window came from.
+        """
+        limit = self.tokenizer.model_max_length
+        span = limit - 2
+        stride = max(1, span - self.window_overlap)
+        windows = []
+        owners = []
+        for row, sequence in enumerate(ids):
+            if len(sequence) <= limit:
+                windows.append(sequence)
+                owners.append(row)
+                continue
+            body = sequence[1:-1]
+            count = max(1, min(self.max_windows, -(-(len(body) - span) // stride) + 1))
+            # Evenly spaced starts: `stride` apart when uncapped, spread over the review when capped
+            for start in np.linspace(0, len(body) - span, count).round().astype(int):
+                windows.append(np.concatenate(([sequence[0]], body[start:start + span], [sequence[-1]])))
+                owners.append(row)
+        return windows, np.array(owners, dtype=np.int64)
+
+    @staticmethod
+    def _merge_windows(logits, owners, count):
+        """Average the window logits of every review; one window per review returns logits as they are"""
+        if owners is None:
+            return logits
+        merged = np.zeros((count, logits.shape[1]), dtype=np.float32)
+        np.add.at(merged, owners, logits)
+        return merged / np.bincount(owners, minlength=count)[:, None]
+
+    def _plan(self, texts, batch_size=None):
+        """
+        Tokenize texts once and split their positions into batches.
+
+        :return: The token id rows, the batches of row positions, and in window mode the
+                 text every row belongs to (None otherwise).
+        """
+        ids = self._encode(texts)
+        owners = None
+        if self.long_reviews == "window":
+            # Windows of all reviews are batched together like any other sequence
+            ids, owners = self._windows(ids)
+        if self.scheduler is not None:
+            # Group reviews of similar length under the token budget
+            lengths = [len(row) for row in ids]
+            batches = self.scheduler.plan(lengths)
+            self.scheduler.record(lengths, batches)
+        else:
+            batch_size = batch_size or self.batch_size
+            batches = [list(range(start, min(start + batch_size, len(ids)))) for start in range(0, len(ids), batch_size)]
+        return ids, batches, owners
+
+    def _start_batches(self, texts, batch_size, done, failed):
+        """
+        Start every batch on the AsyncInferQueue without waiting for the results.
+
+        Exactly one of the callbacks is called, once:
+
+        :param done: Called from the callback of the last batch to finish, with the
+                     (len(texts), 2) logit array in input order.
+        :param failed: Called with the first exception, raised either while starting a
+                       batch or in a completion callback. Later batches are not started
+                       and the results of those in flight are dropped.
+        """
+        ids, batches, owners = self._plan(texts, batch_size)
+        logits = np.empty((len(ids), 2), dtype=np.float32)
+        state = {"remaining": len(batches), "failed": False}
+        lock = threading.Lock()
+
+        def complete(batch, batch_logits=None, error=None):
+            with lock:
+                if state["failed"]:
+                    return
+                if error is None:
+                    logits[batch] = batch_logits
+                    state["remaining"] -= 1
+                    last = state["remaining"] == 0
+                else:
+                    state["failed"] = True
+            if error is not None:
+                failed(error)
+            elif last:
+                try:
+                    merged = self._merge_windows(logits, owners, len(texts))
+                except Exception as e:
+                    failed(e)
+                else:
+                    done(merged)
+
+        for batch in batches:
+            if state["failed"]:
+                break
+            try:
+                encoded = self.tokenizer.pad([ids[index] for index in batch])
+                with self._queue_lock:
+                    self.infer_queue.start_async(encoded, (complete, batch))
+            except Exception as e:
+                complete(batch, error=e)
+                break
+
+    def _on_infer_done(self, request, userdata):
+        complete, batch = userdata
+        try:
+            # Copy: the output tensor belongs to the request, which is reused for the next batch
+            batch_logits = request.get_output_tensor(0).data.copy()
+        except Exception as e:
+            complete(batch, error=e)
+            return
+        complete(batch, batch_logits)
+
+    def _infer_heavy_ids(self, ids):
+        """Heavy ML model logits for token id lists, padded to the longest one"""
+        encoded = self.tokenizer.pad(ids)
+        inputs = {
+            "input_ids": encoded["input_ids"],
+            "attention_mask": encoded["attention_mask"],
+        }
+        result = self.infer_request.infer(inputs=inputs)
+        return next(iter(result.values()))
+
+    def _infer_simple_batch(self, texts):
+        """Simple rule-based labels for a list of texts, with log-probabilities as logits"""
+        labels, confidences = self.simple_classifier.predict_batch(texts)
+        # Confidence goes to the predicted class; NEUTRAL rows stay at 0.5 / 0.5
+        confidences = np.minimum(confidences, self.lexicon_max_probability)
+        positive = np.array([label == "POSITIVE" for label in labels])
+        positive_probability = np.where(positive, confidences, 1 - confidences)
+        probabilities = np.stack([1 - positive_probability, positive_probability], axis=1)
+        return list(labels), np.log(probabilities).astype(np.float32)
     
     def _infer_simple(self, input_text):
         """Simple rule-based inference"""
         sentiment, confidence = self.simple_classifier.predict(input_text)
         return sentiment
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a sentiment checkpoint to the OpenVINO IR the classifier serves")
+    parser.add_argument("--checkpoint", required=True, help="Hugging Face checkpoint name or path")
+    parser.add_argument("--model-dir", default="my_models/", help="Directory of cached IRs")
+    parser.add_argument("--max-seq-length", type=int, default=128)
+    args = parser.parse_args()
+    ir_dir = ir_cache_dir(args.checkpoint, args.model_dir, args.max_seq_length)
+    if (ir_dir / "model.xml").exists():
+        print(f"✅ IR already converted: {ir_dir}")
+    else:
+        convert_checkpoint(args.checkpoint, ir_dir, args.max_seq_length)
+        print(f"✅ Converted {args.checkpoint} to {ir_dir}")
@@ -0,0 +1,90 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+from tokenizers import Tokenizer
+
+
+class FastTokenizer:
+    """
+    Thin wrapper over the Rust `tokenizers` library.
+
+    Loads the tokenizer.json saved next to a cached OpenVINO IR so inference does not
+    need to import transformers or torch. Calls mirror the subset of the Hugging Face
+    tokenizer API used by TextClassifier.
+    """
+
+    def __init__(self, tokenizer_file, model_max_length=512, pad_token="[PAD]"):
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_file))
+        # Identifies the vocabulary and settings, e.g. for caches of token ids
+        self.fingerprint = hashlib.sha256(
+            Path(tokenizer_file).read_bytes() + f"|{model_max_length}|{pad_token}".encode()
+        ).hexdigest()[:16]
+        self.model_max_length = model_max_length
+        self.pad_token_id = self.tokenizer.token_to_id(pad_token) or 0
+        self.tokenizer.no_padding()
+        self.tokenizer.no_truncation()
+
+    @classmethod
+    def from_pretrained(cls, directory):
+        """Load the tokenizer files written by `PreTrainedTokenizerFast.save_pretrained`"""
+        directory = Path(directory)
+        config_path = directory / "tokenizer_config.json"
+        config = json.loads(config_path.read_text()) if config_path.exists() else {}
+        model_max_length = config.get("model_max_length", 512)
+        # Hugging Face stores a huge sentinel when the checkpoint does not define a limit
+        if not isinstance(model_max_length, int) or model_max_length > 100_000:
+            model_max_length = 512
+        pad_token = config.get("pad_token", "[PAD]")
+        if isinstance(pad_token, dict):
+            pad_token = pad_token.get("content", "[PAD]")
+        return cls(directory / "tokenizer.json", model_max_length=model_max_length, pad_token=pad_token)
+
+    def __call__(self, texts, truncation=False, padding=False, return_tensors="np", max_length=None):
+        """
+        Tokenize one text or a list of texts into int64 numpy arrays.
+
+        :param texts: A string or a list of strings.
+        :param truncation: Cut every sequence to max_length (defaults to model_max_length).
+        :param padding: Pad to the longest sequence in the batch when truthy.
+        :param return_tensors: Only "np" is supported.
+        :param max_length: Maximum sequence length when truncating.
+        :return: A dict with "input_ids" and "attention_mask" arrays of shape (batch, seq_len).
+        """
+        if return_tensors != "np":
+            raise ValueError("FastTokenizer only supports return_tensors='np'")
+        if isinstance(texts, str):
+            texts = [texts]
+        ids = self.encode(texts, truncation=truncation, max_length=max_length)
+        if not padding and len({len(row) for row in ids}) > 1:
+            raise ValueError("Sequences have different lengths; pass padding=True to batch them")
+        return self.pad(ids)
+
+    def encode(self, texts, truncation=False, max_length=None):
+        """
+        Tokenize a list of texts into lists of token ids, without padding.
+
+        :param truncation: Cut every sequence to max_length (defaults to model_max_length).
+        :param max_length: Maximum sequence length when truncating.
+        """
+        encodings = self.tokenizer.encode_batch(list(texts))
+        limit = (max_length or self.model_max_length) if truncation else None
+        ids = [encoding.ids[:limit] if limit else encoding.ids for encoding in encodings]
+        if limit:
+            # Keep the closing special token ([SEP]) that truncation would otherwise cut
+            ids = [
+                row[:-1] + [encoding.ids[-1]] if len(encoding.ids) > limit else row
+                for row, encoding in zip(ids, encodings)
+            ]
+        return ids
+
+    def pad(self, ids):
+        """Pad token id sequences (lists or arrays) to the longest one as int64 input_ids and attention_mask arrays"""
+        width = max((len(row) for row in ids), default=0)
+        input_ids = np.full((len(ids), width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(ids), width), dtype=np.int64)
+        for row, sequence in enumerate(ids):
+            input_ids[row, :len(sequence)] = sequence
+            attention_mask[row, :len(sequence)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
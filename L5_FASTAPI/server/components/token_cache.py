@@ -0,0 +1,159 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class TokenCache:
+    """
+    Token ids of texts tokenized before, kept on disk as memory-mapped NumPy arrays.
+
+    Every tokenizer (identified by a key that hashes its vocabulary and truncation
+    settings) gets its own directory of immutable segments. A segment holds three
+    arrays: `keys` (a 16-byte digest per text), `offsets` (n + 1 positions) and `ids`
+    (all token ids back to back, int32), so text i has ids[offsets[i]:offsets[i + 1]].
+    Cached rows are returned as read-only views into the mapped files; nothing is
+    copied until the batch is padded. The attention mask of an unpadded row is all
+    ones, so it is rebuilt when padding instead of being stored.
+
+    Newly tokenized texts are written as a new segment (to a temporary directory that
+    is renamed into place), so several processes can share one cache directory.
+    Segments are merged once there are more than `max_segments`.
+    """
+
+    def __init__(self, root, max_segments=16):
+        """
+        :param root: Directory holding one subdirectory per tokenizer key.
+        :param max_segments: Segments per tokenizer before they are merged into one.
+        """
+        self.root = Path(root)
+        self.max_segments = max_segments
+        self._tables = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def digest(text):
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def encode(self, tokenizer_key, texts, encode):
+        """
+        Token ids for texts, tokenizing only the ones not cached under this tokenizer.
+
+        :param tokenizer_key: Identifies the tokenizer and its settings.
+        :param encode: Called with the list of distinct missing texts; returns one list
+                       of token ids per text.
+        :return: One int32 array per text, in input order.
+        """
+        digests = [self.digest(text) for text in texts]
+        with self._lock:
+            table = self._tables.get(tokenizer_key)
+            if table is None:
+                table = self._tables[tokenizer_key] = _Table(self.root / tokenizer_key)
+            rows = table.find(digests)
+            if any(row is None for row in rows):
+                # Another process may have tokenized these since the last look
+                table.scan()
+                rows = table.find(digests)
+            missing = {digest: text for digest, text, row in zip(digests, texts, rows) if row is None}
+            self._stats["hits"] += len(rows) - sum(row is None for row in rows)
+            self._stats["misses"] += len(missing)
+        if missing:
+            # Tokenize outside the lock; other threads keep reading cached rows meanwhile
+            computed = [np.asarray(ids, dtype=np.int32) for ids in encode(list(missing.values()))]
+            with self._lock:
+                table.append(list(missing), computed)
+                if len(table.segments) > self.max_segments:
+                    table.compact()
+            computed = dict(zip(missing, computed))
+            rows = [computed[digest] if row is None else row for digest, row in zip(digests, rows)]
+        return rows
+
+    def stats(self):
+        """Hits and misses since creation, and the cached rows per tokenizer"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+                "root": str(self.root),
+                "tokenizers": {key: len(table.index) for key, table in self._tables.items()},
+            }
+
+
+class _Table:
+    """The segments of one tokenizer, with an index from text digest to (segment, row)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segments = {}
+        self.index = {}
+        self.scan()
+
+    def scan(self):
+        """Map segments written since the last scan (by this or another process)"""
+        for segment in sorted(self.path.glob("segment-*")):
+            if segment.name in self.segments or segment.name.endswith(".tmp"):
+                continue
+            try:
+                keys = np.load(segment / "keys.npy", mmap_mode="r")
+                offsets = np.load(segment / "offsets.npy", mmap_mode="r")
+                ids = np.load(segment / "ids.npy", mmap_mode="r")
+            except (OSError, ValueError):
+                # Removed by a concurrent compaction
+                continue
+            self.segments[segment.name] = (offsets, ids)
+            for row, key in enumerate(keys):
+                self.index[key.tobytes()] = (segment.name, row)
+
+    def find(self, digests):
+        rows = []
+        for digest in digests:
+            location = self.index.get(digest)
+            if location is None:
+                rows.append(None)
+                continue
+            offsets, ids = self.segments[location[0]]
+            row = location[1]
+            rows.append(ids[offsets[row]:offsets[row + 1]])
+        return rows
+
+    def append(self, digests, rows):
+        name = self._write(digests, rows)
+        offsets = np.load(self.path / name / "offsets.npy", mmap_mode="r")
+        ids = np.load(self.path / name / "ids.npy", mmap_mode="r")
+        self.segments[name] = (offsets, ids)
+        for row, digest in enumerate(digests):
+            self.index[digest] = (name, row)
+
+    def compact(self):
+        """Merge every segment into one; open mappings of removed files stay valid"""
+        digests = list(self.index)
+        rows = self.find(digests)
+        old = list(self.segments)
+        self.segments = {}
+        self.index = {}
+        self.append(digests, rows)
+        for name in old:
+            shutil.rmtree(self.path / name, ignore_errors=True)
+
+    def _write(self, digests, rows):
+        name = f"segment-{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+        tmp = self.path / f"{name}.tmp"
+        tmp.mkdir()
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.concatenate(rows).astype(np.int32, copy=False) if rows else np.empty(0, dtype=np.int32)
+        keys = np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(len(digests), 16)
+        np.save(tmp / "keys.npy", keys)
+        np.save(tmp / "offsets.npy", offsets)
+        np.save(tmp / "ids.npy", ids)
+        # The segment appears complete or not at all
+        tmp.rename(self.path / name)
+        return name
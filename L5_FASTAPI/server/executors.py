@@ -0,0 +1,127 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import workers
+
+# OpenVINO releases the GIL during inference, so threads are enough for the classifier
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "2"))
+# Presidio/spaCy and better_profanity are pure Python hot loops; 0 runs them on a thread instead
+PII_PROCESSES = int(os.getenv("PII_PROCESSES", "2"))
+# Jobs queued or running per executor before new requests are rejected with 429
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "4"))
+# Seconds the PII workers have at startup to load their models
+WORKER_START_TIMEOUT = float(os.getenv("WORKER_START_TIMEOUT", "600"))
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when a bounded executor already holds its maximum number of jobs."""
+
+
+class BoundedExecutor:
+    """
+    A concurrent.futures executor with a cap on queued plus running jobs.
+
+    Submitting past the cap raises ExecutorBusyError immediately instead of growing
+    an unbounded queue, so the API can answer 429 and clients can back off.
+    """
+
+    def __init__(self, name, executor, max_pending=MAX_PENDING_JOBS):
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        self._acquire()
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn, *args):
+        """Submit fn and await its result without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def run_coroutine(self, fn, *args):
+        """
+        Await the coroutine function fn on the event loop, holding one job slot.
+
+        For work that is already asynchronous (the classifier's AsyncInferQueue), so it
+        is rejected with ExecutorBusyError past the cap like submitted jobs.
+        """
+        self._acquire()
+        try:
+            return await fn(*args)
+        finally:
+            self._release()
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorBusyError(f"{self.name} executor is busy ({self.max_pending} jobs pending), retry later")
+        with self._lock:
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+
+def create_inference_executor(threads=INFERENCE_THREADS, max_pending=MAX_PENDING_JOBS):
+    """Thread pool for the OpenVINO classifier"""
+    return BoundedExecutor(
+        "inference",
+        ThreadPoolExecutor(max_workers=threads, thread_name_prefix="inference"),
+        max_pending,
+    )
+
+
+def create_pii_executor(processes=PII_PROCESSES, max_pending=MAX_PENDING_JOBS):
+    """Process pool for anonymization and masking; each worker loads its own models once"""
+    if processes <= 0:
+        return BoundedExecutor("pii", ThreadPoolExecutor(max_workers=1, thread_name_prefix="pii"), max_pending)
+    executor = ProcessPoolExecutor(
+        max_workers=processes,
+        # spawn avoids forking the event loop and the loader threads of the API process
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=workers.init_worker,
+    )
+    return BoundedExecutor("pii", executor, max_pending)
+
+
+def warm_up_pii_workers(executor, processes=PII_PROCESSES, timeout=WORKER_START_TIMEOUT):
+    """
+    Start every PII worker and wait until each one has loaded its models.
+
+    The spawn pool starts workers on demand, so a single health call would start (and
+    warm) only one of them. Here `processes` calls are submitted at once and each
+    waits on a shared barrier until all of them are running, so every call lands on
+    a different worker. Runs in a thread; the calls bypass the job cap, which may be
+    lower than the number of workers.
+
+    :return: {"ready": ..., "workers": [health of every worker]}; ready only when all
+             workers answered and are ready.
+    """
+    with multiprocessing.get_context("spawn").Manager() as manager:
+        barrier = manager.Barrier(processes, timeout=timeout)
+        futures = [executor.executor.submit(workers.worker_health, barrier) for _ in range(processes)]
+        health = [future.result() for future in futures]
+    return {
+        "ready": all(worker["ready"] for worker in health) and len({worker["pid"] for worker in health}) == processes,
+        "workers": health,
+    }
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+from components.googlereviews import CSVProcessor
+from components.sentiment_classifier.main import SCORE_COLUMNS
+from executors import ExecutorBusyError
+import workers
+
+# Every job gets its own directory below JOBS_DIR for its input and result files
+JOBS_DIR = Path(os.getenv("JOBS_DIR", "jobs"))
+# Rows per executor submission; smaller chunks give finer progress and fairer sharing between jobs
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "64"))
+# Chunks of one job in flight at once, so a single job can use several workers
+JOB_PARALLEL_CHUNKS = int(os.getenv("JOB_PARALLEL_CHUNKS", "2"))
+# Rows read from the upload at a time in streaming mode
+STREAM_CHUNKSIZE = int(os.getenv("STREAM_CHUNKSIZE", "10000"))
+STAGES = ("process_csv", "anonymise", "mask_profanity", "classify")
+MODES = ("batch", "stream")
+
+
+class Job:
+    """State of one uploaded dataset moving through the pipeline."""
+
+    def __init__(self, job_id, filename, directory, mode="batch", chunksize=STREAM_CHUNKSIZE):
+        self.id = job_id
+        self.filename = filename
+        self.directory = directory
+        self.mode = mode
+        self.chunksize = chunksize
+        self.status = "queued"
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.stages = {stage: {"state": "pending", "processed": 0, "total": 0, "seconds": None} for stage in STAGES}
+
+    @property
+    def input_path(self):
+        return self.directory / "reviews.csv"
+
+    @property
+    def result_path(self):
+        return self.directory / "output_classified.csv"
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "mode": self.mode,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "stages": {stage: dict(progress) for stage, progress in self.stages.items()},
+        }
+
+
+class JobManager:
+    """
+    Keeps track of pipeline jobs and runs each one as a background task.
+
+    Jobs never share files: the upload and the result live in the job's own
+    directory, so any number of datasets can be processed concurrently.
+    """
+
+    def __init__(self, base_dir=JOBS_DIR, chunk_size=JOB_CHUNK_SIZE, parallel_chunks=JOB_PARALLEL_CHUNKS):
+        self.base_dir = Path(base_dir)
+        self.chunk_size = chunk_size
+        self.parallel_chunks = parallel_chunks
+        self._jobs = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def create(self, upload, filename, mode="batch", chunksize=STREAM_CHUNKSIZE):
+        """
+        Store the uploaded file and register a queued job.
+
+        :param upload: The file contents as bytes, or a binary file object copied in blocks.
+        :param mode: "batch" loads the whole table, "stream" processes it chunksize rows at a time.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown job mode {mode!r}, expected one of {MODES}")
+        job_id = uuid.uuid4().hex
+        directory = self.base_dir / job_id
+        directory.mkdir(parents=True, exist_ok=True)
+        job = Job(job_id, filename, directory, mode=mode, chunksize=chunksize)
+        if isinstance(upload, bytes):
+            job.input_path.write_bytes(upload)
+        else:
+            with open(job.input_path, "wb") as f:
+                shutil.copyfileobj(upload, f)
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def start(self, job, pii_executor, inference_executor):
+        """Schedule the job on the running event loop"""
+        task = asyncio.create_task(self.run(job, pii_executor, inference_executor))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return task
+
+    def delete(self, job_id):
+        """Forget a job and remove its files; a running job is cancelled first"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        task = self._tasks.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+        if job is not None:
+            shutil.rmtree(job.directory, ignore_errors=True)
+        return job
+
+    async def shutdown(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    async def run(self, job, pii_executor, inference_executor):
+        """Run the four pipeline stages for one job"""
+        job.status = "running"
+        try:
+            if job.mode == "stream":
+                await self._run_streaming(job, pii_executor, inference_executor)
+            else:
+                df = await self._run_stage(job, "process_csv", self._process_csv, job)
+                df = await self._run_text_stages(job, df, pii_executor, inference_executor)
+                await asyncio.to_thread(df.to_csv, job.result_path, index=False)
+            for progress in job.stages.values():
+                progress["state"] = "done"
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            for progress in job.stages.values():
+                if progress["state"] == "running":
+                    progress["state"] = "failed"
+            print(f"⚠️  Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    async def _run_text_stages(self, job, df, pii_executor, inference_executor):
+        """Anonymize, mask and classify one table (the whole upload or one streamed chunk)"""
+        texts = df.iloc[:, 0].tolist()
+        # Only distinct texts missing from the result cache are analyzed. Shards are
+        # analyzed in parallel; placeholders are assigned afterwards in row order
+        found, missing = await asyncio.to_thread(workers.lookup_anonymized, texts)
+        # Progress is in rows: cached rows are done already, and every analyzed text
+        # stands for all the rows that repeat it
+        counts = Counter(texts)
+        cached_rows = len(texts) - sum(counts[text] for text in missing)
+        job.stages["anonymise"]["total"] += cached_rows
+        job.stages["anonymise"]["processed"] += cached_rows
+        analyze_results = await self._run_chunked(
+            job, "anonymise", pii_executor, workers.analyze_texts, missing, rows=[counts[text] for text in missing]
+        )
+        found.update(zip(missing, await asyncio.to_thread(workers.anonymize_analyzed, missing, analyze_results)))
+        df['Anonymized_Text'] = [found[text] for text in texts]
+        df['Masked_Text'] = await self._run_chunked(
+            job, "mask_profanity", pii_executor, workers.mask_texts, df['Anonymized_Text'].tolist()
+        )
+        scores = await self._run_chunked(
+            job, "classify", inference_executor, workers.classify_texts, df['Masked_Text'].tolist()
+        )
+        df[list(SCORE_COLUMNS)] = pd.DataFrame(scores, columns=SCORE_COLUMNS, index=df.index)
+        return df
+
+    async def _run_streaming(self, job, pii_executor, inference_executor):
+        """Push the upload through the stages chunk by chunk, appending to the result file"""
+        chunks = CSVProcessor.iter_chunks(job.input_path, job.chunksize)
+        rows = 0
+        while True:
+            df = await self._run_stage(job, "process_csv", next, chunks, None)
+            if df is None:
+                break
+            df = await self._run_text_stages(job, df, pii_executor, inference_executor)
+            await asyncio.to_thread(
+                df.to_csv, job.result_path, mode="a" if rows else "w", header=not rows, index=False
+            )
+            rows += len(df)
+
+    @staticmethod
+    def _process_csv(job):
+        processor = CSVProcessor(job.input_path)
+        return processor.df
+
+    async def _run_stage(self, job, stage, fn, *args):
+        """Run a whole-table stage off the event loop and record its timing"""
+        progress = job.stages[stage]
+        progress["state"] = "running"
+        start = time.perf_counter()
+        result = await asyncio.to_thread(fn, *args)
+        rows = 0 if result is None else len(result)
+        progress["processed"] += rows
+        progress["total"] += rows
+        progress["seconds"] = round((progress["seconds"] or 0) + time.perf_counter() - start, 3)
+        # Streaming jobs revisit every stage once per chunk
+        progress["state"] = "running" if job.mode == "stream" else "done"
+        return result
+
+    async def _run_chunked(self, job, stage, executor, fn, texts, rows=None):
+        """
+        Run a per-row stage in chunks so progress can be reported while it runs
+
+        :param rows: Table rows each text stands for, when texts were deduplicated;
+                     one each by default.
+        """
+        progress = job.stages[stage]
+        progress["state"] = "running"
+        rows = [1] * len(texts) if rows is None else rows
+        progress["total"] += sum(rows)
+        start = time.perf_counter()
+        in_flight = asyncio.Semaphore(self.parallel_chunks)
+
+        async def run_chunk(chunk, chunk_rows):
+            async with in_flight:
+                result = await self._submit(executor, fn, chunk)
+            progress["processed"] += chunk_rows
+            return result
+
+        chunks = await asyncio.gather(*(
+            run_chunk(texts[begin:begin + self.chunk_size], sum(rows[begin:begin + self.chunk_size]))
+            for begin in range(0, len(texts), self.chunk_size)
+        ))
+        results = [item for chunk in chunks for item in chunk]
+        progress["seconds"] = round((progress["seconds"] or 0) + time.perf_counter() - start, 3)
+        # Streaming jobs revisit every stage once per chunk
+        progress["state"] = "running" if job.mode == "stream" else "done"
+        return results
+
+    @staticmethod
+    async def _submit(executor, fn, chunk):
+        # Background jobs wait for a free slot instead of failing with 429
+        while True:
+            try:
+                return await executor.run(fn, chunk)
+            except ExecutorBusyError:
+                await asyncio.sleep(0.1)
+
+
+# Shared by every request handled by this process
+job_manager = JobManager()
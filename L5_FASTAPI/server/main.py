@@ -1,13 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from components.googlereviews import CSVProcessor
-from components.PII.pii import TextAnalyzerService
-from components.profanity_masker.main import profanity_masker
-from components.sentiment_classifier.main import TextClassifier
+from registry import registry, ModelNotReadyError, CLASSIFIER_THROUGHPUT
+from components.sentiment_classifier.main import SCORE_COLUMNS
+from components.profanity_masker.wordlists import UnknownWordlistError
+from jobs import job_manager, MODES, STREAM_CHUNKSIZE
+from executors import (
+    ExecutorBusyError, create_inference_executor, create_pii_executor, warm_up_pii_workers, PII_PROCESSES
+)
+import workers
 import pandas as pd
 
-app = FastAPI()
+
+async def load_models(app: FastAPI):
+    """Load the API process models, then make sure the PII workers have loaded theirs"""
+    # With a process pool the PII models live in the workers, not in this process
+    names = ("anonymizer", "classifier") if PII_PROCESSES > 0 else ("text_analyzer", "anonymizer", "masker", "classifier")
+    await asyncio.to_thread(registry.load, names)
+    if PII_PROCESSES > 0:
+        try:
+            # One health call per worker: each loads its models before /health reports ready
+            app.state.pii_workers = await asyncio.to_thread(warm_up_pii_workers, app.state.pii_executor)
+        except Exception as e:
+            app.state.pii_workers = {"ready": False, "error": str(e)}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.inference_executor = create_inference_executor()
+    app.state.pii_executor = create_pii_executor()
+    app.state.pii_workers = {"ready": PII_PROCESSES <= 0}
+    # Load the models in the background so /health can report progress
+    loader = asyncio.create_task(load_models(app))
+    yield
+    if not loader.done():
+        loader.cancel()
+    await job_manager.shutdown()
+    app.state.inference_executor.shutdown()
+    app.state.pii_executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allowing CORS Headers
 origins = ["http://localhost:3000", "*"]
@@ -20,11 +56,54 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+async def run_stage(executor, fn, *args):
+    """Await a pipeline stage on a bounded executor, mapping backpressure and loading to HTTP errors"""
+    try:
+        return await executor.run(fn, *args)
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def classify_texts(texts):
+    """
+    Classify on the AsyncInferQueue in throughput mode, otherwise on the inference threads.
+
+    :return: One row of SCORE_COLUMNS per text.
+    """
+    if not CLASSIFIER_THROUGHPUT:
+        return await run_stage(app.state.inference_executor, workers.classify_texts, texts)
+    try:
+        classifier = registry.classifier
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    # No thread is used, but the call still takes an inference slot so load past
+    # MAX_PENDING_JOBS is answered with 429 instead of queueing on the infer requests
+    try:
+        labels, logits = await app.state.inference_executor.run_coroutine(classifier.infer_logits_async, texts)
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    return classifier.score_frame(labels, logits).values.tolist()
+
 # Root endpoint
 @app.get('/')
 async def root():
     return {'message': 'This is the root of the app'}
 
+# Readiness of the long-lived models
+@app.get('/health')
+async def health():
+    status = registry.health()
+    status["pii_workers"] = app.state.pii_workers
+    status["executors"] = {
+        "inference": app.state.inference_executor.stats(),
+        "pii": app.state.pii_executor.stats(),
+    }
+    status["ready"] = status["ready"] and app.state.pii_workers.get("ready", False)
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
 # Endpoint to upload file
 @app.post('/upload')
 async def upload(file: UploadFile = File(...)):
@@ -39,6 +118,66 @@ async def upload(file: UploadFile = File(...)):
         # Handle errors during file upload
         raise HTTPException(status_code=500, detail=str(e))
 
+# Endpoint to start a pipeline job for an uploaded file
+@app.post('/jobs', status_code=202)
+async def createJob(file: UploadFile = File(...), mode: str = "batch", chunksize: int = STREAM_CHUNKSIZE):
+    if mode not in MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {MODES}")
+    if chunksize <= 0:
+        raise HTTPException(status_code=422, detail="chunksize must be positive")
+    try:
+        # Copy the spooled upload to the job directory without reading it into memory
+        job = await asyncio.to_thread(job_manager.create, file.file, file.filename, mode, chunksize)
+        job_manager.start(job, app.state.pii_executor, app.state.inference_executor)
+        print(f"/jobs: Job {job.id} queued") #Log message
+        return {"job_id": job.id, "mode": job.mode, "status": job.status}
+    except Exception as e:
+        # Handle errors during job creation
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Endpoint to list all jobs
+@app.get('/jobs')
+async def listJobs():
+    return job_manager.list()
+
+def get_job(job_id, finished=False):
+    """Look up a job, answering 404 if unknown and 409 if its result is not ready yet"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if finished and job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    return job
+
+# Endpoint to report job status and per-stage progress
+@app.get('/jobs/{job_id}')
+async def jobStatus(job_id: str):
+    return get_job(job_id).to_dict()
+
+# Endpoint to download the result of a job
+@app.get('/jobs/{job_id}/download')
+async def jobDownload(job_id: str):
+    job = get_job(job_id, finished=True)
+    return FileResponse(path=job.result_path, filename="output_classified.csv", media_type='text/csv')
+
+# Endpoint to read the result of a job
+@app.get('/jobs/{job_id}/read-data')
+async def jobReadData(job_id: str):
+    job = get_job(job_id, finished=True)
+    try:
+        df = await asyncio.to_thread(pd.read_csv, job.result_path)
+        return df.to_dict(orient='records')
+    except Exception as e:
+        # Handle errors during data reading
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Endpoint to cancel a job and delete its files
+@app.delete('/jobs/{job_id}')
+async def deleteJob(job_id: str):
+    get_job(job_id)
+    job_manager.delete(job_id)
+    return {"message": f"Job {job_id} deleted"}
+
 # Endpoint to process CSV file
 @app.get('/process_csv')
 async def processCSV():
@@ -59,26 +198,19 @@ async def anonymise():
     try:
         # Read contents of processed_reviews.csv
         df = pd.read_csv("processed_reviews.csv")
-        # Initialize TextAnalyzerService with specified model
-        text_analyzer_service_model1 = TextAnalyzerService(model_choice="obi/deid_roberta_i2b2")
-        anonymized_texts = []
-
-        # Iterate over each row in the dataframe
-        for _, row in df.iterrows():
-            text = row[0]  # Extract the text from the first column
-            # Analyze the text to identify entities
-            entities_model1 = text_analyzer_service_model1.analyze_text(text)
-            # Anonymize the text based on identified entities
-            anonymized_text, _ = text_analyzer_service_model1.anonymize_text(text, entities_model1, operator="encrypt")
-            # Append the anonymized text to the list
-            anonymized_texts.append(anonymized_text)
-
-        # Add the anonymized texts to the dataframe
-        df['Anonymized_Text'] = anonymized_texts
+        # Find entities in the first column on the PII workers, then number them in row order;
+        # texts already in the result cache skip both steps
+        texts = df.iloc[:, 0].tolist()
+        found, missing = await asyncio.to_thread(workers.lookup_anonymized, texts)
+        analyze_results = await run_stage(app.state.pii_executor, workers.analyze_texts, missing)
+        found.update(zip(missing, await asyncio.to_thread(workers.anonymize_analyzed, missing, analyze_results)))
+        df['Anonymized_Text'] = [found[text] for text in texts]
         # Save the updated dataframe to output_anonymized.csv
         df.to_csv("output_anonymized.csv", index=False)
         print("/anonymise: Anonymization done successfully")  # Log message
         return {"message": "Anonymization done successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         # Handle errors during anonymization
         raise HTTPException(status_code=500, detail=str(e))
@@ -86,17 +218,20 @@ async def anonymise():
 
 # Endpoint to mask profanity in entries in CSV file
 @app.get('/mask_profanity')
-async def maskProfanity():
+async def maskProfanity(wordlist: str = None):
     try:
         # Read contents of output_anonymized.csv
         df = pd.read_csv("output_anonymized.csv")
-        # Initialize profanity masker
-        masker = profanity_masker()
-        # Apply profanity masking to anonymized text
-        df['Masked_Text'] = df['Anonymized_Text'].apply(lambda text: masker.mask_words(text))
+        # Apply profanity masking to anonymized text on the PII workers
+        texts = df['Anonymized_Text'].tolist()
+        df['Masked_Text'] = await run_stage(app.state.pii_executor, workers.mask_texts, texts, wordlist)
         df.to_csv("output_masked.csv", index=False)
         print("/mask_profanity: Profanity masking done successfully") #Log message
         return {"message": "Profanity masking done successfully"}
+    except HTTPException:
+        raise
+    except UnknownWordlistError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         # Handle errors during profanity masking
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,14 +242,15 @@ async def classify():
     try:
         # Read contents of output_masked.csv
         df = pd.read_csv("output_masked.csv")
-        # Initialize text classifier with specified checkpoint
-        checkpoint = "distilbert-base-uncased-finetuned-sst-2-english"
-        classifier = TextClassifier(checkpoint)
-        # Apply classification to masked text
-        df['Classification_Result'] = df['Masked_Text'].apply(lambda text: classifier.infer(text))
+        # Classify masked text in batches
+        texts = df['Masked_Text'].tolist()
+        # The label with its positive probability and logits, so nothing has to re-infer for confidence
+        df[list(SCORE_COLUMNS)] = pd.DataFrame(await classify_texts(texts), columns=SCORE_COLUMNS, index=df.index)
         df.to_csv("output_classified.csv", index=False)
         print("/classify: Classification done successfully") #Log message
         return {"message": "Classification done successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         # Handle errors during classification
         raise HTTPException(status_code=500, detail=str(e))
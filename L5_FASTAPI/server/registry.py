@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+
+from components.PII.pii import TextAnalyzerService
+from components.PII.mapping_store import create_mapping_store
+from components.result_cache import create_result_cache
+from components.token_cache import TokenCache
+from components.batching import TokenBudgetScheduler
+from components.profanity_masker.main import profanity_masker
+from components.profanity_masker.wordlists import parse_wordlists
+from components.sentiment_classifier.main import TextClassifier
+
+PII_MODEL = os.getenv("PII_MODEL", "obi/deid_roberta_i2b2")
+CLASSIFIER_CHECKPOINT = os.getenv("CLASSIFIER_CHECKPOINT", "distilbert-base-uncased-finetuned-sst-2-english")
+# "fp32" or "int8"; the INT8 IR is quantized with NNCF on CALIBRATION_FILE on first use and cached
+CLASSIFIER_PRECISION = os.getenv("CLASSIFIER_PRECISION", "fp32")
+# A fixed reviews file, never the one /upload overwrites, so restarts calibrate on the same data
+CALIBRATION_FILE = os.getenv("CALIBRATION_FILE", "calibration_reviews.csv")
+# "1" rebuilds the cached INT8 IR when CALIBRATION_FILE changed; otherwise it is kept
+CLASSIFIER_REQUANTIZE = os.getenv("CLASSIFIER_REQUANTIZE", "0") == "1"
+# "1" compiles the classifier for throughput and runs it on an AsyncInferQueue
+CLASSIFIER_THROUGHPUT = os.getenv("CLASSIFIER_THROUGHPUT", "0") == "1"
+# Seconds a throughput-mode call waits for its batches before failing
+CLASSIFIER_TIMEOUT = float(os.getenv("CLASSIFIER_TIMEOUT", "60"))
+# "1" lets the lexicon model answer confident reviews and escalates the rest to the transformer
+CLASSIFIER_CASCADE = os.getenv("CLASSIFIER_CASCADE", "0") == "1"
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.8"))
+CASCADE_MIN_POLARITY = float(os.getenv("CASCADE_MIN_POLARITY", "0.5"))
+# Fraction of confident reviews also run through the transformer to measure agreement
+CASCADE_AUDIT = float(os.getenv("CASCADE_AUDIT", "0"))
+# "1" serves only a prebuilt IR and never converts (or imports torch) in the server
+CLASSIFIER_INFERENCE_ONLY = os.getenv("CLASSIFIER_INFERENCE_ONLY", "0") == "1"
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+# "memory" or "sqlite:///<dir>"; a SQLite store keeps placeholders across restarts and processes
+PII_MAPPING_STORE = os.getenv("PII_MAPPING_STORE", "memory")
+# Extra profanity word lists as "name=path,name=path", served next to the default list
+# and re-read when their files change
+PROFANITY_WORDLISTS = parse_wordlists(os.getenv("PROFANITY_WORDLISTS", ""))
+# Per-text stage results keyed by content hash: "off", "memory" or "sqlite:///<file>".
+# A SQLite file is shared by the PII workers and survives restarts.
+RESULT_CACHE = os.getenv("RESULT_CACHE", "memory")
+# Entries kept in memory per process, in front of the SQLite file
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+# "truncate" cuts reviews at the model's maximum length; "window" classifies overlapping
+# windows of long reviews (at most MAX_WINDOWS each) and averages their logits
+LONG_REVIEWS = os.getenv("LONG_REVIEWS", "truncate")
+MAX_WINDOWS = int(os.getenv("MAX_WINDOWS", "4"))
+# Directory of memory-mapped token ids keyed by tokenizer; empty tokenizes every request
+TOKEN_CACHE_DIR = os.getenv("TOKEN_CACHE_DIR", "")
+# Token budget per transformer batch (batch size x longest review); 0 keeps fixed-size batches
+MAX_BATCH_TOKENS = int(os.getenv("MAX_BATCH_TOKENS", "8192"))
+COMPONENTS = ("text_analyzer", "anonymizer", "masker", "classifier")
+
+# A few short reviews pushed through every stage at startup so the first real
+# request does not pay for lazy initialisation (spaCy pipes, OpenVINO compile)
+WARMUP_REVIEWS = [
+    "The food was great and the staff were friendly.",
+    "Terrible service, my name is John and nobody called me back.",
+    "Prices are affordable but you have to wait 10-15 minutes.",
+]
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a component is requested before it finished loading."""
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the pipeline models.
+
+    Each component is constructed once (normally from the FastAPI lifespan) and then
+    shared by every request, so per-request latency is inference time only.
+    """
+
+    def __init__(self, pii_model=PII_MODEL, classifier_checkpoint=CLASSIFIER_CHECKPOINT, warmup=MODEL_WARMUP):
+        self.pii_model = pii_model
+        self.classifier_checkpoint = classifier_checkpoint
+        self.warmup_enabled = warmup
+        self.result_cache = None
+        self._components = {}
+        self._status = {}
+        self._lock = threading.Lock()
+
+    def load(self, names=COMPONENTS):
+        """
+        Load the named components, recording load time and failures instead of raising.
+
+        :param names: Components this process serves. PII worker processes only load
+                      the text analyzer and masker; the API process may load only the classifier.
+        """
+        if self.result_cache is None:
+            # One cache per process, shared by every stage it serves
+            self.result_cache = create_result_cache(RESULT_CACHE, memory_size=RESULT_CACHE_SIZE)
+        loaders = {
+            "text_analyzer": lambda: TextAnalyzerService(model_choice=self.pii_model, scheduler=self._scheduler()),
+            # Numbers entities found by the text analyzers, which may live in other processes
+            "anonymizer": lambda: TextAnalyzerService(
+                model_choice=self.pii_model,
+                load_nlp=False,
+                entity_mapping=create_mapping_store(PII_MAPPING_STORE),
+                result_cache=self.result_cache,
+            ),
+            "masker": lambda: profanity_masker(wordlists=PROFANITY_WORDLISTS, result_cache=self.result_cache),
+            "classifier": lambda: TextClassifier(
+                self.classifier_checkpoint,
+                result_cache=self.result_cache,
+                scheduler=self._scheduler(),
+                precision=CLASSIFIER_PRECISION,
+                calibration_data=CALIBRATION_FILE if os.path.exists(CALIBRATION_FILE) else None,
+                requantize=CLASSIFIER_REQUANTIZE,
+                throughput=CLASSIFIER_THROUGHPUT,
+                infer_timeout=CLASSIFIER_TIMEOUT,
+                inference_only=CLASSIFIER_INFERENCE_ONLY,
+                cascade=CLASSIFIER_CASCADE,
+                cascade_min_confidence=CASCADE_MIN_CONFIDENCE,
+                cascade_min_polarity=CASCADE_MIN_POLARITY,
+                cascade_audit=CASCADE_AUDIT,
+                token_cache=TokenCache(TOKEN_CACHE_DIR) if TOKEN_CACHE_DIR else None,
+                long_reviews=LONG_REVIEWS,
+                max_windows=MAX_WINDOWS,
+            ),
+        }
+        for name in names:
+            self._set_status(name, state="pending")
+        for name in names:
+            loader = loaders[name]
+            self._set_status(name, state="loading")
+            start = time.perf_counter()
+            try:
+                component = loader()
+            except Exception as e:
+                self._set_status(name, state="failed", error=str(e))
+                print(f"⚠️  Failed to load {name}: {e}")
+                continue
+            with self._lock:
+                self._components[name] = component
+            self._set_status(name, state="ready", load_seconds=round(time.perf_counter() - start, 3))
+        if self.warmup_enabled:
+            self.warmup(WARMUP_REVIEWS)
+
+    def warmup(self, texts):
+        """Run a few reviews through every loaded stage"""
+        start = time.perf_counter()
+        try:
+            if "text_analyzer" in self._components:
+                self._components["text_analyzer"].analyze_batch(texts)
+            if "masker" in self._components:
+                for text in texts:
+                    self._components["masker"].mask_words(text)
+            if "classifier" in self._components:
+                self._components["classifier"].infer_batch(texts)
+        except Exception as e:
+            print(f"⚠️  Warmup failed: {e}")
+            return
+        print(f"✅ Warmup done in {time.perf_counter() - start:.2f} seconds")
+
+    def get(self, name):
+        """Return a loaded component or raise ModelNotReadyError"""
+        with self._lock:
+            component = self._components.get(name)
+        if component is None:
+            state = self._status.get(name, {}).get("state", "not loaded in this process")
+            raise ModelNotReadyError(f"{name} is not ready (state: {state})")
+        return component
+
+    @property
+    def text_analyzer(self):
+        return self.get("text_analyzer")
+
+    @property
+    def anonymizer(self):
+        return self.get("anonymizer")
+
+    @property
+    def masker(self):
+        return self.get("masker")
+
+    @property
+    def classifier(self):
+        return self.get("classifier")
+
+    def health(self):
+        """Readiness summary for the /health endpoint"""
+        # One snapshot of both: the loader thread may be registering components meanwhile
+        with self._lock:
+            components = {name: dict(status) for name, status in self._status.items()}
+            loaded = dict(self._components)
+        ready = bool(components) and all(status["state"] == "ready" for status in components.values())
+        status = {"ready": ready, "components": components}
+        if self.result_cache is not None:
+            status["result_cache"] = self.result_cache.stats()
+        schedulers = {
+            name: component.scheduler
+            for name, component in loaded.items()
+            if getattr(component, "scheduler", None) is not None
+        }
+        classifier = loaded.get("classifier")
+        if classifier is not None:
+            # Process RSS around the classifier load, and whether torch ended up resident
+            status["classifier_memory"] = classifier.memory_report
+            if classifier.token_cache is not None:
+                status["token_cache"] = classifier.token_cache.stats()
+            cascade = classifier.cascade_stats()
+            if cascade:
+                # Share of reviews the transformer had to see, and how often the lexicon agreed
+                status["cascade"] = cascade
+        if classifier is not None and classifier.quantization_report:
+            # INT8 agreement with FP32 on held-out reviews, measured when the IR was built
+            status["quantization"] = classifier.quantization_report
+        if schedulers:
+            # Padding waste of the token-budget batches, next to fixed-size batching
+            status["batching"] = {name: scheduler.stats() for name, scheduler in schedulers.items()}
+        return status
+
+    @staticmethod
+    def _scheduler():
+        return TokenBudgetScheduler(max_tokens=MAX_BATCH_TOKENS) if MAX_BATCH_TOKENS > 0 else None
+
+    def _set_status(self, name, **status):
+        with self._lock:
+            self._status[name] = status
+
+
+# Shared by every request handled by this process
+registry = ModelRegistry()
@@ -31,9 +31,13 @@ echo "🔧 Starting server on port 13001..."
 echo "📖 Access the API at: http://localhost:13001"
 echo "📚 API Documentation: http://localhost:13001/docs"
 echo "� Pipeline endpoints:"
+echo "   • GET /health - Model readiness"
+echo "   • POST /jobs - Upload a CSV and run the whole pipeline as a job"
+echo "   • GET /jobs/{id} - Job status and per-stage progress"
+echo "   • GET /jobs/{id}/download - Download a job's results"
 echo "   • GET /process_csv - Process uploaded CSV"
 echo "   • GET /anonymise - Anonymize PII data"
-echo "   • GET /mask_profanity - Mask profanity"
+echo "   • GET /mask_profanity - Mask profanity (?wordlist=<name> for a PROFANITY_WORDLISTS list)"
 echo "   • GET /classify - Classify sentiment"
 echo "   • GET /download - Download results"
 echo "   • GET /read-data - Read processed data"
@@ -0,0 +1,167 @@
+"""
+Completion logic of the classifier's throughput mode, driven by a fake AsyncInferQueue.
+
+Run from L5_FASTAPI/server with `python -m pytest tests`; OpenVINO is not needed.
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from components.sentiment_classifier.main import TextClassifier  # noqa: E402
+
+
+class FakeTokenizer:
+    """Encodes "<n>" as [n]; the fake model's logits are (-n, n)"""
+
+    def encode(self, texts, truncation=True):
+        return [[int(text)] for text in texts]
+
+    def pad(self, ids):
+        return {"input_ids": np.array(ids, dtype=np.int64)}
+
+
+class FakeInferQueue:
+    """
+    Records started batches; finish() runs their callbacks on other threads, in any order.
+
+    :param fail_on: Batch number (in start order) whose request raises when read.
+    :param start_error: Batch number whose start_async raises.
+    """
+
+    def __init__(self, fail_on=None, start_error=None):
+        self.callback = None
+        self.started = []
+        self.fail_on = fail_on
+        self.start_error = start_error
+
+    def set_callback(self, callback):
+        self.callback = callback
+
+    def start_async(self, inputs, userdata):
+        if len(self.started) == self.start_error:
+            raise RuntimeError("no idle request")
+        self.started.append((inputs, userdata))
+
+    def finish(self, order):
+        threads = [threading.Thread(target=self._complete, args=(number,)) for number in order]
+        for thread in threads:
+            thread.start()
+            # One callback at a time keeps the completion order deterministic
+            thread.join()
+
+    def _complete(self, number):
+        inputs, userdata = self.started[number]
+        values = inputs["input_ids"][:, 0].astype(np.float32)
+        if number == self.fail_on:
+            def output(index):
+                raise RuntimeError("inference failed")
+        else:
+            def output(index):
+                return SimpleNamespace(data=np.stack([-values, values], axis=1))
+        self.callback(SimpleNamespace(get_output_tensor=output), userdata)
+
+
+def make_classifier(queue, batch_size=2, infer_timeout=5.0):
+    """A throughput-mode TextClassifier wired to fakes instead of a compiled model"""
+    classifier = TextClassifier.__new__(TextClassifier)
+    classifier.tokenizer = FakeTokenizer()
+    classifier.token_cache = None
+    classifier.long_reviews = "truncate"
+    classifier.scheduler = None
+    classifier.batch_size = batch_size
+    classifier.throughput = True
+    classifier.infer_timeout = infer_timeout
+    classifier.use_heavy_model = True
+    classifier.cascade = False
+    classifier.result_cache = None
+    classifier.infer_queue = queue
+    classifier._queue_lock = threading.Lock()
+    queue.set_callback(classifier._on_infer_done)
+    return classifier
+
+
+def start(classifier, texts):
+    outcome = {}
+    classifier._start_batches(
+        texts, None,
+        lambda logits: outcome.setdefault("logits", logits),
+        lambda error: outcome.setdefault("error", error),
+    )
+    return outcome
+
+
+def test_out_of_order_completions_keep_input_order():
+    queue = FakeInferQueue()
+    classifier = make_classifier(queue)
+    outcome = start(classifier, ["1", "-2", "3", "-4", "5"])
+    assert len(queue.started) == 3
+    queue.finish([2, 0])
+    assert outcome == {}
+    queue.finish([1])
+    np.testing.assert_array_equal(outcome["logits"][:, 1], [1, -2, 3, -4, 5])
+
+
+def test_failed_request_reports_the_error_once():
+    queue = FakeInferQueue(fail_on=1)
+    classifier = make_classifier(queue)
+    outcome = start(classifier, ["1", "2", "3", "4", "5", "6"])
+    queue.finish([0, 1, 2])
+    assert "logits" not in outcome
+    assert str(outcome["error"]) == "inference failed"
+
+
+def test_start_error_stops_later_batches():
+    queue = FakeInferQueue(start_error=1)
+    classifier = make_classifier(queue)
+    outcome = start(classifier, ["1", "2", "3", "4", "5", "6"])
+    assert len(queue.started) == 1
+    assert str(outcome["error"]) == "no idle request"
+    queue.finish([0])
+    assert "logits" not in outcome
+
+
+def test_async_failure_raises_instead_of_hanging():
+    queue = FakeInferQueue(fail_on=0)
+    classifier = make_classifier(queue)
+
+    async def run():
+        task = asyncio.ensure_future(classifier.infer_logits_async(["1", "2", "3"]))
+        while len(queue.started) < 2:
+            await asyncio.sleep(0.01)
+        queue.finish([1, 0])
+        return await task
+
+    with pytest.raises(RuntimeError, match="inference failed"):
+        asyncio.run(run())
+
+
+def test_async_results_follow_input_order():
+    queue = FakeInferQueue()
+    classifier = make_classifier(queue)
+
+    async def run():
+        task = asyncio.ensure_future(classifier.infer_logits_async(["7", "-8", "9"]))
+        while len(queue.started) < 2:
+            await asyncio.sleep(0.01)
+        queue.finish([1, 0])
+        return await task
+
+    labels, logits = asyncio.run(run())
+    assert list(labels) == ["POSITIVE", "NEGATIVE", "POSITIVE"]
+    np.testing.assert_array_equal(np.asarray(logits)[:, 1], [7, -8, 9])
+
+
+def test_lost_callback_times_out():
+    queue = FakeInferQueue()
+    classifier = make_classifier(queue, infer_timeout=0.1)
+    with pytest.raises(TimeoutError):
+        classifier._infer_transformer(["1", "2", "3"])
+    with pytest.raises(TimeoutError):
+        asyncio.run(classifier.infer_logits_async(["1", "2", "3"]))
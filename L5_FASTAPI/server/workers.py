@@ -0,0 +1,61 @@
+"""
+Stage functions submitted to the server executors.
+
+They are module-level so a process pool can pickle them, and they resolve their
+models through the process-wide registry: PII worker processes populate their own
+registry in init_worker, while the API process uses the one loaded by the lifespan.
+
+Anonymization is split in two: workers only find entities (analyze_texts) and the
+API process assigns the <TYPE_n> placeholders (anonymize_analyzed) in row order, so
+numbering is the same no matter how rows were sharded across workers. Texts the
+API process has anonymized before are answered from its result cache (lookup_anonymized)
+and never reach the workers.
+"""
+import os
+
+from registry import registry
+
+PII_COMPONENTS = ("text_analyzer", "masker")
+
+
+def init_worker():
+    """Process pool initializer: load the PII stage models once per worker"""
+    registry.load(names=PII_COMPONENTS)
+
+
+def worker_health(barrier=None):
+    """
+    Readiness of the registry in whichever process runs this
+
+    :param barrier: Shared barrier the call waits on until every worker has taken one,
+                    so no worker answers twice (see executors.warm_up_pii_workers).
+    """
+    if barrier is not None:
+        barrier.wait()
+    return {**registry.health(), "pid": os.getpid()}
+
+
+def analyze_texts(texts):
+    """Find PII entities in a list of texts, returned as picklable tuples"""
+    analyzer = registry.text_analyzer
+    return [analyzer.serialize_results(results) for results in analyzer.analyze_batch(texts)]
+
+
+def lookup_anonymized(texts):
+    """Cached anonymized texts, and the distinct texts that still have to be analyzed"""
+    return registry.anonymizer.lookup_anonymized(texts, operator="encrypt")
+
+
+def anonymize_analyzed(texts, analyze_results):
+    """Replace the entities found by analyze_texts, numbering them in row order"""
+    return registry.anonymizer.anonymize_analyzed(texts, analyze_results, operator="encrypt")
+
+
+def mask_texts(texts, wordlist=None):
+    """Mask profanity in a list of texts with a named word list (the default one when None)"""
+    return registry.masker.mask_batch(texts, wordlist)
+
+
+def classify_texts(texts):
+    """Classify a list of texts, one [label, positive probability, negative logit, positive logit] row each"""
+    return registry.classifier.infer_scores(texts).values.tolist()
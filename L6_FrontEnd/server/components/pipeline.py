@@ -0,0 +1,196 @@
+import importlib.util
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from .googlereviews import CSVProcessor
+except ImportError:
+    # If relative import fails, try absolute import
+    from googlereviews import CSVProcessor
+
+
+class Stage:
+    """
+    One step of the review pipeline.
+
+    A stage receives the DataFrame produced by the previous stage and returns it with
+    its own output column added. Subclasses set `name` and `artifact` (the file name
+    used when the stage output is materialized) and implement `run`.
+    """
+
+    name = "stage"
+    artifact = "output"
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        raise NotImplementedError
+
+    @staticmethod
+    def column(df, column):
+        """Select a column by name or by 0-based position"""
+        return df.iloc[:, column] if isinstance(column, int) else df[column]
+
+
+class CSVProcessorStage(Stage):
+    """Load the reviews file (or take a DataFrame) and drop unused columns."""
+
+    name = "process_csv"
+    artifact = "processed_reviews"
+
+    def __init__(self, columns_to_drop=None):
+        self.columns_to_drop = columns_to_drop or []
+
+    def run(self, source):
+        if isinstance(source, pd.DataFrame):
+            return source.drop(columns=self.columns_to_drop)
+        processor = CSVProcessor(source)
+        if self.columns_to_drop:
+            processor.drop_columns(self.columns_to_drop)
+        return processor.df
+
+
+class AnonymizeStage(Stage):
+    """Replace PII with Presidio through TextAnalyzerService."""
+
+    name = "anonymise"
+    artifact = "output_anonymized"
+
+    def __init__(self, analyzer=None, input_column=0, output_column="Anonymized_Text", operator="encrypt"):
+        if analyzer is None:
+            try:
+                from .PII.pii import TextAnalyzerService
+            except ImportError:
+                from PII.pii import TextAnalyzerService
+            analyzer = TextAnalyzerService(model_choice="obi/deid_roberta_i2b2")
+        self.analyzer = analyzer
+        self.input_column = input_column
+        self.output_column = output_column
+        self.operator = operator
+
+    def anonymize(self, text):
+        anonymized, _ = self.analyzer.anonymize_text(text, self.analyzer.analyze_text(text), operator=self.operator)
+        # anonymize_text returns an EngineResult on success and "" on failure
+        return getattr(anonymized, "text", anonymized)
+
+    def run(self, df):
+        df[self.output_column] = [self.anonymize(text) for text in self.column(df, self.input_column)]
+        return df
+
+
+class ProfanityMaskStage(Stage):
+    """Mask profanity with better_profanity."""
+
+    name = "mask_profanity"
+    artifact = "output_masked"
+
+    def __init__(self, masker=None, input_column="Anonymized_Text", output_column="Masked_Text"):
+        if masker is None:
+            try:
+                from .profanity_masker.main import profanity_masker
+            except ImportError:
+                from profanity_masker.main import profanity_masker
+            masker = profanity_masker()
+        self.masker = masker
+        self.input_column = input_column
+        self.output_column = output_column
+
+    def run(self, df):
+        df[self.output_column] = [self.masker.mask_words(text) for text in self.column(df, self.input_column)]
+        return df
+
+
+class ClassifyStage(Stage):
+    """Classify sentiment with TextClassifier."""
+
+    name = "classify"
+    artifact = "output_classified"
+
+    def __init__(self, classifier=None, input_column="Masked_Text", output_column="Classification_Result"):
+        if classifier is None:
+            try:
+                from .sentiment_classifier.main import TextClassifier
+            except ImportError:
+                from sentiment_classifier.main import TextClassifier
+            classifier = TextClassifier("distilbert-base-uncased-finetuned-sst-2-english")
+        self.classifier = classifier
+        self.input_column = input_column
+        self.output_column = output_column
+
+    def run(self, df):
+        df[self.output_column] = [self.classifier.infer(text) for text in self.column(df, self.input_column)]
+        return df
+
+
+class Pipeline:
+    """
+    Runs stages in order, passing one DataFrame along in memory.
+
+    Nothing is written between stages unless `materialize` asks for it, in which case
+    the selected stage outputs are saved to `output_dir` in `materialize_format`
+    (csv by default; parquet and feather need pyarrow).
+    """
+
+    writers = {
+        "parquet": lambda df, path: df.to_parquet(path, index=False),
+        "feather": lambda df, path: df.reset_index(drop=True).to_feather(path),
+        "csv": lambda df, path: df.to_csv(path, index=False),
+    }
+
+    def __init__(self, stages, materialize=None, output_dir=".", materialize_format="csv"):
+        """
+        :param stages: Stage instances in execution order.
+        :param materialize: True for every stage, or an iterable of stage names to save.
+        :param output_dir: Directory for materialized stage outputs.
+        :param materialize_format: One of "parquet", "feather" or "csv".
+        """
+        if materialize_format not in self.writers:
+            raise ValueError(f"Unknown materialize format {materialize_format!r}")
+        if materialize and materialize_format != "csv" and importlib.util.find_spec("pyarrow") is None:
+            # Fail before any stage runs rather than after the first one
+            raise ValueError(f"Materializing as {materialize_format} needs pyarrow; install it or use csv")
+        self.stages = list(stages)
+        if materialize is True:
+            materialize = [stage.name for stage in self.stages]
+        self.materialize = set(materialize or [])
+        self.output_dir = Path(output_dir)
+        self.materialize_format = materialize_format
+        self.timings = {}
+        self.columns = {}
+
+    @classmethod
+    def default(cls, columns_to_drop=None, analyzer=None, masker=None, classifier=None, **kwargs):
+        """The standard CSVProcessor → PII → profanity → classifier pipeline"""
+        return cls(
+            [
+                CSVProcessorStage(columns_to_drop),
+                AnonymizeStage(analyzer),
+                ProfanityMaskStage(masker),
+                ClassifyStage(classifier),
+            ],
+            **kwargs,
+        )
+
+    def run(self, source):
+        """
+        Push a reviews file path or DataFrame through every stage.
+
+        :return: The final DataFrame. `timings` holds seconds per stage and `columns`
+                 the column names present after each stage.
+        """
+        data = source
+        for stage in self.stages:
+            start = time.perf_counter()
+            data = stage.run(data)
+            self.timings[stage.name] = time.perf_counter() - start
+            self.columns[stage.name] = list(data.columns)
+            if stage.name in self.materialize:
+                self.save(data, stage.artifact)
+        return data
+
+    def save(self, df, artifact):
+        """Write one stage output in the configured format and return its path"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{artifact}.{self.materialize_format}"
+        self.writers[self.materialize_format](df, path)
+        return path